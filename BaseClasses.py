@@ -5,6 +5,7 @@ import functools
 import logging
 import random
 import secrets
+import weakref
 from argparse import Namespace
 from collections import Counter, deque
 from collections.abc import Collection, MutableSequence
@@ -67,6 +68,8 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    state_type: type[CollectionState]
+    """Class the states of generation are created as, see the bitset_state generator setting."""
 
     plando_options: PlandoOptions
     early_items: Dict[int, Dict[str, int]]
@@ -160,6 +163,7 @@ class MultiWorld():
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
+        self.state_type = CollectionState
 
         for player in range(1, players + 1):
             def set_player_attr(attr: str, val) -> None:
@@ -432,7 +436,7 @@ class MultiWorld():
         if use_cache and cached:
             return cached.copy()
 
-        ret = CollectionState(self, allow_partial_entrances)
+        ret = self.state_type(self, allow_partial_entrances)
 
         for item in self.itempool:
             self.worlds[item.player].collect(ret, item)
@@ -492,6 +496,16 @@ class MultiWorld():
         return Utils.RepeatableChain(tuple(self.regions.entrance_cache[player].values()
                                            for player in self.regions.entrance_cache))
 
+    def get_location_dependencies(self) -> Dict[int, Mapping[str, AbstractSet[Location]]]:
+        """Returns the location dependency index of each world providing one, see
+        World.get_location_dependencies."""
+        dependencies: Dict[int, Mapping[str, AbstractSet[Location]]] = {}
+        for player, world in self.worlds.items():
+            index = world.get_location_dependencies()
+            if index is not None:
+                dependencies[player] = index
+        return dependencies
+
     def register_indirect_condition(self, region: Region, entrance: Entrance):
         """Report that access to this Region can result in unlocking this Entrance,
         state.can_reach(Region) in the Entrance's traversal condition, as opposed to pure transition logic."""
@@ -545,33 +559,41 @@ class MultiWorld():
         else:
             return all((self.has_beaten_game(state, p) for p in range(1, self.players + 1)))
 
-    def can_beat_game(self, starting_state: Optional[CollectionState] = None) -> bool:
+    def can_beat_game(self, starting_state: Optional[CollectionState] = None,
+                      known_spheres: Optional[Iterable[AbstractSet[Location]]] = None) -> bool:
+        """
+        :param starting_state: state to start from, a new CollectionState by default
+        :param known_spheres: spheres found from the starting state with at least the current items, see SphereSearch
+        """
         if starting_state:
             if self.has_beaten_game(starting_state):
                 return True
             state = starting_state.copy()
         else:
-            state = CollectionState(self)
+            state = self.state_type(self)
             if self.has_beaten_game(state):
                 return True
-        prog_locations = {location for location in self.get_locations() if location.item
+        if known_spheres is None:
+            locations: Iterable[Location] = self.get_locations()
+        else:
+            # nothing else can be reached
+            known_spheres = tuple(known_spheres)
+            locations = (location for sphere in known_spheres for location in sphere)
+        prog_locations = {location for location in locations if location.item
                           and location.item.advancement and location not in state.locations_checked}
+        search = SphereSearch(state, prog_locations, known_spheres)
 
-        while prog_locations:
-            sphere: Set[Location] = set()
+        while search.remaining:
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = search.next_sphere()
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
                 return False
 
             for location in sphere:
-                state.collect(location.item, True, location)
-            prog_locations -= sphere
+                search.collect(location)
 
             if self.has_beaten_game(state):
                 return True
@@ -586,24 +608,18 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
+        search = SphereSearch(self.state_type(self), self.get_filled_locations())
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+        while search.remaining:
+            sphere = search.next_sphere()
             yield sphere
             if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
+                if search.remaining:
+                    yield search.remaining  # unreachable locations
                 break
 
             for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+                search.collect(location)
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -612,7 +628,7 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
+        state = self.state_type(self)
         locations: Set[Location] = set()
         events: Set[Location] = set()
         for location in self.get_filled_locations():
@@ -651,7 +667,7 @@ class MultiWorld():
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
         if not state:
-            state = CollectionState(self)
+            state = self.state_type(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -853,18 +869,32 @@ class CollectionState():
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None) -> None:
         if locations is None:
             locations = self.multiworld.get_filled_locations()
-        reachable_advancements = True
         # since the loop has a good chance to run more than once, only filter the advancements once
         locations = {location for location in locations if location.advancement and location not in self.advancements}
+        dependencies = self.multiworld.get_location_dependencies()
+        candidates = locations
 
-        while reachable_advancements:
-            reachable_advancements = {location for location in locations if location.can_reach(self)}
+        while candidates:
+            reachable_advancements = {location for location in candidates if location.can_reach(self)}
             locations -= reachable_advancements
             for advancement in reachable_advancements:
                 self.advancements.add(advancement)
                 assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
                 self.collect(advancement.item, True, advancement)
 
+            if not reachable_advancements:
+                break
+            if dependencies:
+                # only recheck the indexed locations depending on what was just collected
+                candidates = {location for location in locations if location.player not in dependencies}
+                for advancement in reachable_advancements:
+                    index = dependencies.get(advancement.item.player)
+                    dependents = index.get(advancement.item.name) if index else None
+                    if dependents:
+                        candidates |= locations & dependents
+            else:
+                candidates = locations
+
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
         return self.prog_items[player][item] >= count
@@ -1008,6 +1038,344 @@ class CollectionState():
             self.stale[item.player] = True
 
 
+class SphereSearch:
+    """
+    Finds the logical spheres of a set of locations one after the other, collecting into the given state.
+
+    Between spheres, locations of worlds providing a location dependency index are only tested again once an item
+    they depend on got collected, see World.get_location_dependencies.
+    Spheres found earlier for the same locations with at least the same items can be given as known_spheres, then
+    each location is only tested from the sphere it was found in on, as removing items never makes anything reachable
+    sooner. Locations missing from the known spheres are never tested.
+    """
+    state: CollectionState
+    remaining: Set[Location]
+    sphere_count: int
+    dependencies: Dict[int, Mapping[str, AbstractSet[Location]]]
+    unindexed: Set[Location]
+    """remaining locations tested for every sphere"""
+    indexed: Set[Location]
+    """remaining locations waiting for one of their dependencies"""
+    changed: Set[Location]
+    """indexed locations to test for the next sphere"""
+    deferred: Dict[int, Set[Location]]
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location],
+                 known_spheres: Optional[Iterable[AbstractSet[Location]]] = None) -> None:
+        self.state = state
+        self.remaining = set(locations)
+        self.sphere_count = 0
+        self.dependencies = state.multiworld.get_location_dependencies()
+        self.unindexed = set()
+        self.indexed = set()
+        self.changed = set()
+        if known_spheres is None:
+            self.deferred = {0: self.remaining.copy()}
+        else:
+            self.deferred = {num: self.remaining & sphere for num, sphere in enumerate(known_spheres)}
+
+    def next_sphere(self) -> Set[Location]:
+        """Returns the remaining locations reachable in the current state, without collecting them."""
+        for location in self.deferred.pop(self.sphere_count, ()):
+            if location not in self.remaining:
+                continue
+            if location.player in self.dependencies:
+                self.indexed.add(location)
+                self.changed.add(location)
+            else:
+                self.unindexed.add(location)
+        self.sphere_count += 1
+        sphere = {location for location in self.unindexed if location.can_reach(self.state)}
+        sphere.update(location for location in self.changed if location.can_reach(self.state))
+        self.changed = set()
+        self.discard(sphere)
+        return sphere
+
+    def collect(self, location: Location) -> None:
+        """Collects the item of a location, marking the locations depending on it to be tested again."""
+        item = location.item
+        assert isinstance(item, Item), "tried to collect Event with no Item"
+        self.state.collect(item, True, location)
+        index = self.dependencies.get(item.player)
+        dependents = index.get(item.name) if index else None
+        if dependents:
+            self.changed |= self.indexed & dependents
+
+    def discard(self, locations: AbstractSet[Location]) -> None:
+        """Removes locations from the search, like ones found by other means."""
+        self.remaining.difference_update(locations)
+        self.unindexed.difference_update(locations)
+        self.indexed.difference_update(locations)
+        self.changed.difference_update(locations)
+
+
+class StateIndex:
+    """
+    Interned positions of the item names and locations of a multiworld, shared by every BitsetCollectionState created
+    for it. Positions are only ever appended, so they stay valid across copies.
+    """
+    item_positions: Dict[str, int]
+    item_names: List[str]
+    location_positions: Dict[Location, int]
+    locations: Dict[int, List[Location]]
+
+    _indexes: ClassVar[weakref.WeakKeyDictionary[MultiWorld, StateIndex]] = weakref.WeakKeyDictionary()
+
+    def __init__(self) -> None:
+        self.item_positions = {}
+        self.item_names = []
+        self.location_positions = {}
+        self.locations = collections.defaultdict(list)
+
+    @classmethod
+    def get(cls, multiworld: MultiWorld) -> StateIndex:
+        index = cls._indexes.get(multiworld)
+        if index is None:
+            index = cls._indexes[multiworld] = StateIndex()
+        return index
+
+    def intern_item(self, item: str) -> int:
+        position = self.item_positions.get(item)
+        if position is None:
+            position = self.item_positions[item] = len(self.item_names)
+            self.item_names.append(item)
+        return position
+
+    def intern_location(self, location: Location) -> int:
+        """Position of a location in the bitsets of its player."""
+        position = self.location_positions.get(location)
+        if position is None:
+            player_locations = self.locations[location.player]
+            position = self.location_positions[location] = len(player_locations)
+            player_locations.append(location)
+        return position
+
+
+class ItemCounts(collections.abc.MutableMapping):
+    """
+    Counter-like item counts of a player, stored in a list indexed by the interned item names.
+    The list is shared between copies until one of them is written to.
+    Unlike a Counter, an item with a count of 0 is the same as a missing one, like CollectionState.remove keeps it:
+    it is not contained, iterated or counted in the length, and get returns the default for it.
+    """
+    __slots__ = ("_index", "_counts", "_shared")
+
+    _index: StateIndex
+    _counts: List[int]
+    _shared: bool
+
+    def __init__(self, index: StateIndex, counts: Optional[List[int]] = None) -> None:
+        self._index = index
+        self._counts = counts if counts is not None else []
+        self._shared = counts is not None
+
+    def __getitem__(self, item: str) -> int:
+        position = self._index.item_positions.get(item)
+        if position is None or position >= len(self._counts):
+            return 0
+        return self._counts[position]
+
+    def __setitem__(self, item: str, count: int) -> None:
+        position = self._index.intern_item(item)
+        counts = self._counts
+        if self._shared:
+            counts = self._counts = counts.copy()
+            self._shared = False
+        if position >= len(counts):
+            counts.extend([0] * (len(self._index.item_names) - len(counts)))
+        counts[position] = count
+
+    def __delitem__(self, item: str) -> None:
+        # like Counter, deleting a missing item is not an error
+        if self[item]:
+            self[item] = 0
+
+    def __contains__(self, item: object) -> bool:
+        return self[item] != 0
+
+    def __iter__(self) -> Iterator[str]:
+        item_names = self._index.item_names
+        return (item_names[position] for position, count in enumerate(self._counts) if count)
+
+    def __len__(self) -> int:
+        return len(self._counts) - self._counts.count(0)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())})"
+
+    def get(self, item: str, default: Any = None) -> Any:
+        count = self[item]
+        return count if count else default
+
+    def copy(self) -> ItemCounts:
+        self._shared = True
+        return ItemCounts(self._index, self._counts)
+
+    def total(self) -> int:
+        return sum(self._counts)
+
+    def update(self, other: Union[Mapping[str, int], Iterable[str]] = (), /, **kwargs: int) -> None:
+        """Adds the counts like Counter.update does, instead of replacing them."""
+        for item, count in Counter(other, **kwargs).items():
+            self[item] += count
+
+    def subtract(self, other: Union[Mapping[str, int], Iterable[str]] = (), /, **kwargs: int) -> None:
+        """Subtracts the counts like Counter.subtract does, counts can go below 0."""
+        for item, count in Counter(other, **kwargs).items():
+            self[item] -= count
+
+
+class LocationBitset(collections.abc.MutableSet):
+    """
+    Set of locations, stored as an integer bitset per player using the positions interned in a StateIndex.
+    Integers are immutable, so copying it only copies the per player mapping.
+    """
+    __slots__ = ("_index", "_masks")
+
+    _index: StateIndex
+    _masks: Dict[int, int]
+
+    def __init__(self, index: StateIndex, locations: Iterable[Location] = (),
+                 masks: Optional[Dict[int, int]] = None) -> None:
+        self._index = index
+        self._masks = masks if masks is not None else {}
+        for location in locations:
+            self.add(location)
+
+    def __contains__(self, location: object) -> bool:
+        position = self._index.location_positions.get(location)
+        return position is not None and self._masks.get(location.player, 0) >> position & 1 == 1
+
+    def __iter__(self) -> Iterator[Location]:
+        for player, mask in list(self._masks.items()):
+            player_locations = self._index.locations[player]
+            while mask:
+                low = mask & -mask
+                yield player_locations[low.bit_length() - 1]
+                mask ^= low
+
+    def __len__(self) -> int:
+        return sum(mask.bit_count() for mask in self._masks.values())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({set(self)})"
+
+    def _from_iterable(self, locations: Iterable[Location]) -> LocationBitset:
+        return LocationBitset(self._index, locations)
+
+    def add(self, location: Location) -> None:
+        masks = self._masks
+        masks[location.player] = masks.get(location.player, 0) | 1 << self._index.intern_location(location)
+
+    def discard(self, location: Location) -> None:
+        position = self._index.location_positions.get(location)
+        if position is not None and location.player in self._masks:
+            self._masks[location.player] &= ~(1 << position)
+
+    def clear(self) -> None:
+        self._masks = {}
+
+    def copy(self) -> LocationBitset:
+        return LocationBitset(self._index, masks=self._masks.copy())
+
+    def update(self, *others: Iterable[Location]) -> None:
+        for locations in others:
+            for location in locations:
+                self.add(location)
+
+    def difference(self, *others: Iterable[Location]) -> LocationBitset:
+        ret = self.copy()
+        for locations in others:
+            for location in locations:
+                ret.discard(location)
+        return ret
+
+    def union(self, *others: Iterable[Location]) -> LocationBitset:
+        ret = self.copy()
+        ret.update(*others)
+        return ret
+
+
+class BitsetCollectionState(CollectionState):
+    """
+    Alternative CollectionState representation for large multiworlds, making copies cheap no matter how many players
+    there are: item counts are lists indexed by interned item names and the checked locations and collected
+    advancements are integer bitsets per player, all shared with copies until written to.
+    The reachable regions stay regular sets for fast membership tests, but they're also shared with copies until
+    update_reachable_regions has to change them, so they must not be modified anywhere else.
+    The has/count/has_all API and the set/Counter-like access to the attributes are kept.
+    """
+    prog_items: Dict[int, ItemCounts]  # type: ignore[assignment]
+    advancements: LocationBitset  # type: ignore[assignment]
+    locations_checked: LocationBitset  # type: ignore[assignment]
+    index: StateIndex
+    shared_regions: Set[int]
+    """Players whose reachable_regions and blocked_connections are shared with another state."""
+
+    def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
+        index = self.index = StateIndex.get(parent)
+        self.prog_items = {player: ItemCounts(index) for player in parent.get_all_ids()}
+        self.multiworld = parent
+        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
+        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.shared_regions = set()
+        self.advancements = LocationBitset(index)
+        self.path = {}
+        self.locations_checked = LocationBitset(index)
+        self.stale = {player: True for player in parent.get_all_ids()}
+        self.allow_partial_entrances = allow_partial_entrances
+        for function in self.additional_init_functions:
+            function(self, parent)
+        for items in parent.precollected_items.values():
+            for item in items:
+                self.collect(item, True)
+
+    def update_reachable_regions(self, player: int):
+        if player in self.shared_regions:
+            self.shared_regions.remove(player)
+            self.reachable_regions[player] = self.reachable_regions[player].copy()
+            self.blocked_connections[player] = self.blocked_connections[player].copy()
+        super().update_reachable_regions(player)
+
+    def copy(self) -> BitsetCollectionState:
+        ret = self.__class__.__new__(self.__class__)
+        ret.multiworld = self.multiworld
+        ret.index = self.index
+        ret.prog_items = {player: counts.copy() for player, counts in self.prog_items.items()}
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        self.shared_regions = set(self.reachable_regions)
+        ret.shared_regions = self.shared_regions.copy()
+        ret.advancements = self.advancements.copy()
+        ret.locations_checked = self.locations_checked.copy()
+        ret.path = self.path.copy()
+        ret.stale = self.stale.copy()
+        ret.allow_partial_entrances = self.allow_partial_entrances
+        # the mixins expect their initialized attributes to be there before copying them over
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
+        for function in self.additional_copy_functions:
+            ret = function(self, ret)
+        return ret
+
+    # has and count are the bulk of the rule evaluations, so they skip the mapping interface of ItemCounts
+    def has(self, item: str, player: int, count: int = 1) -> bool:
+        position = self.index.item_positions.get(item)
+        if position is not None:
+            counts = self.prog_items[player]._counts
+            if position < len(counts):
+                return counts[position] >= count
+        return count <= 0
+
+    def count(self, item: str, player: int) -> int:
+        position = self.index.item_positions.get(item)
+        if position is not None:
+            counts = self.prog_items[player]._counts
+            if position < len(counts):
+                return counts[position]
+        return 0
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1476,20 +1844,20 @@ class Spoiler:
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
-        state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
+        state = multiworld.state_type(multiworld)
+        search = SphereSearch(state, prog_locations)
+        sphere_candidates = search.remaining
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            sphere = search.next_sphere()
 
             for location in sphere:
-                state.collect(location.item, True, location)
+                search.collect(location)
 
-            sphere_candidates -= sphere
             collection_spheres.append(sphere)
             state_cache.append(state.copy())
 
@@ -1518,7 +1886,8 @@ class Spoiler:
                               location.item.player)
                 old_item = location.item
                 location.item = None
-                if multiworld.can_beat_game(state_cache[num]):
+                # without the item, nothing can be reached sooner than in the spheres found with it
+                if multiworld.can_beat_game(state_cache[num], collection_spheres[num:]):
                     to_delete.add(location)
                     restore_later[location] = old_item
                 else:
@@ -1552,21 +1921,22 @@ class Spoiler:
         # used to access it was deemed not required.) So we need to do one final sphere collection pass
         # to build up the correct spheres
 
-        required_locations = {item for sphere in collection_spheres for item in sphere}
-        state = CollectionState(multiworld)
+        state = multiworld.state_type(multiworld)
+        search = SphereSearch(state, (location for sphere in collection_spheres for location in sphere),
+                              collection_spheres)
+        required_locations = search.remaining
         collection_spheres = []
         while required_locations:
-            sphere = set(filter(state.can_reach, required_locations))
+            sphere = search.next_sphere()
 
             for location in sphere:
-                state.collect(location.item, True, location)
+                search.collect(location)
 
             collection_spheres.append(sphere)
 
             logging.debug('Calculated final sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere), len(required_locations))
+                          len(sphere), len(required_locations) + len(sphere))
 
-            required_locations -= sphere
             if not sphere:
                 raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
 
@@ -1,10 +1,12 @@
+import bisect
 import collections
+import heapq
 import itertools
 import logging
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, SphereSearch
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -33,6 +35,131 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class IncrementalSweep:
+    """
+    Maximum exploration states of a fill, without collecting the whole pool and sweeping from the base state each time.
+
+    A checkpoint holds the base state swept with the items of the pool that are placed last. Each state is then a copy
+    of the checkpoint with the rest of the pool collected and swept on top of it, so placing an item only retracts it
+    from what's collected after the checkpoint. Sweeping is monotonic, so the result is the same as sweep_from_pool as
+    long as the checkpoint items are still in the pool and the locations it swept still hold the same items and are
+    still to be swept. Otherwise a new checkpoint is made from the items that are still to be placed last.
+    """
+    base_state: CollectionState
+    checkpoint: typing.Optional[CollectionState]
+    checkpoint_items: typing.Set[int]
+    """ids of the items collected by the checkpoint"""
+    checkpoint_placements: typing.List[typing.Tuple[Location, typing.Optional[Item]]]
+    """locations the checkpoint swept on top of the base state, with the items they held"""
+
+    def __init__(self, base_state: CollectionState) -> None:
+        self.base_state = base_state
+        self.checkpoint = None
+        self.checkpoint_items = set()
+        self.checkpoint_placements = []
+
+    def is_valid(self, pool_ids: typing.AbstractSet[int], locations: typing.Optional[typing.List[Location]]) -> bool:
+        if self.checkpoint is None or not self.checkpoint_items <= pool_ids:
+            return False
+        if locations is None:
+            return all(location.item is item for location, item in self.checkpoint_placements)
+        # single player fills sweep a different player's locations each batch
+        sweep_locations = set(locations)
+        return all(location.item is item and location in sweep_locations
+                   for location, item in self.checkpoint_placements)
+
+    def sweep(self, itempool: typing.Sequence[Item], locations: typing.Optional[typing.List[Location]] = None,
+              placed_last: typing.Iterable[Item] = ()) -> CollectionState:
+        """
+        Equivalent to sweep_from_pool(base_state, itempool, locations).
+
+        :param placed_last: items of the pool to build a new checkpoint from if the current one can't be used.
+        """
+        pool_ids = {id(item) for item in itempool}
+        if not self.is_valid(pool_ids, locations):
+            checkpoint_pool = [item for item in placed_last if id(item) in pool_ids]
+            if not checkpoint_pool:
+                return sweep_from_pool(self.base_state, itempool, locations)
+            self.checkpoint = sweep_from_pool(self.base_state, checkpoint_pool, locations)
+            self.checkpoint_items = {id(item) for item in checkpoint_pool}
+            self.checkpoint_placements = [(location, location.item) for location in self.checkpoint.advancements
+                                          if location not in self.base_state.advancements]
+
+        new_state = self.checkpoint.copy()
+        for item in itempool:
+            if id(item) not in self.checkpoint_items:
+                new_state.collect(item, True)
+        new_state.sweep_for_advancements(locations=locations)
+        return new_state
+
+
+class LocationIndex:
+    """
+    The unfilled locations of a fill, partitioned by player and by whether they are excluded, so finding a spot only
+    looks at the partitions that could take the item. Candidates are still tried in the order of the locations list,
+    which is kept in sync, and their reachability is cached for as long as the same state is used.
+    """
+    locations: typing.List[Location]
+    partitions: typing.Dict[typing.Tuple[int, bool], typing.List[typing.Tuple[int, Location]]]
+    positions: typing.Dict[Location, int]
+    state: typing.Optional[CollectionState]
+    reachable: typing.Dict[Location, bool]
+
+    def __init__(self, locations: typing.List[Location]) -> None:
+        self.locations = locations
+        self.partitions = {}
+        self.positions = {}
+        self.state = None
+        self.reachable = {}
+        for position, location in enumerate(locations):
+            self.positions[location] = position
+            self.partitions.setdefault((location.player, self.is_excluded(location)), []).append((position, location))
+
+    @staticmethod
+    def is_excluded(location: Location) -> bool:
+        """Whether the location never takes advancement or useful items, no matter the state."""
+        return location.progress_type == LocationProgressType.EXCLUDED and \
+            location.always_allow is Location.always_allow
+
+    def can_fill(self, location: Location, item: Item, check_access: bool) -> bool:
+        """Location.can_fill in the current state, caching the reachability check."""
+        if not location.can_fill(self.state, item, False):
+            return False
+        if not check_access:
+            return True
+        reachable = self.reachable.get(location)
+        if reachable is None:
+            reachable = self.reachable[location] = location.can_reach(self.state)
+        # always_allow doesn't care about reachability
+        return reachable or location.can_fill(self.state, item, True)
+
+    def find(self, state: CollectionState, item: Item, check_access: bool = True,
+             player: typing.Optional[int] = None) -> typing.Optional[Location]:
+        """
+        Removes and returns the first location that can take the item in the given state.
+
+        :param player: only look at the locations of this player
+        """
+        if state is not self.state:
+            self.state = state
+            self.reachable = {}
+        skip_excluded = item.advancement or item.useful
+        partitions = [partition for (location_player, excluded), partition in self.partitions.items()
+                      if (player is None or location_player == player) and not (excluded and skip_excluded)]
+        candidates = heapq.merge(*partitions) if len(partitions) > 1 else partitions[0] if partitions else ()
+        for position, location in candidates:
+            if self.can_fill(location, item, check_access):
+                self.remove(location)
+                return location
+        return None
+
+    def remove(self, location: Location) -> None:
+        position = self.positions.pop(location)
+        partition = self.partitions[location.player, self.is_excluded(location)]
+        del partition[bisect.bisect_left(partition, (position,))]
+        self.locations.remove(location)
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -62,6 +189,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
+    sweeper = IncrementalSweep(base_state)
+    candidates = LocationIndex(locations)
 
     while any(reachable_items.values()) and locations:
         if one_item_per_player:
@@ -80,9 +209,11 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     item_pool.pop(p)
                     break
 
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+        # items are popped from the end of each player's queue, so the front halves stay in the pool the longest
+        maximum_exploration_state = sweeper.sweep(
+            item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
+            if single_player_placement else None,
+            [queued for items in reachable_items.values() for queued in itertools.islice(items, len(items) // 2)])
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
 
@@ -103,15 +234,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill = candidates.find(maximum_exploration_state, item_to_place, perform_access_check,
+                                           item_to_place.player if single_player_placement else None)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # try swapping this item with previously placed items in a safe way then in an unsafe way
@@ -125,12 +250,17 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                         swap_count = swapped_items[placed_item.player, placed_item.name, unsafe]
                         if swap_count > 1:
                             continue
+                        # skip the sweep if the location can't take the item in any state
+                        if single_player_placement and location.player != item_to_place.player or \
+                                location.always_allow is Location.always_allow and \
+                                not location.can_fill(maximum_exploration_state, item_to_place, False):
+                            continue
 
                         location.item = None
                         placed_item.location = None
-                        swap_state = sweep_from_pool(base_state, [placed_item, *item_pool] if unsafe else item_pool,
-                                                     multiworld.get_filled_locations(item.player)
-                                                     if single_player_placement else None)
+                        swap_state = sweeper.sweep([placed_item, *item_pool] if unsafe else item_pool,
+                                                   multiworld.get_filled_locations(item.player)
+                                                   if single_player_placement else None)
                         # unsafe means swap_state assumes we can somehow collect placed_item before item_to_place
                         # by continuing to swap, which is not guaranteed. This is unsafe because there is no mechanic
                         # to clean that up later, so there is a chance generation fails.
@@ -245,7 +375,7 @@ def remaining_fill(multiworld: MultiWorld,
 
     # Optimisation: Decide whether to do full location.can_fill check (respect excluded), or only check the item rule
     if check_location_can_fill:
-        state = CollectionState(multiworld)
+        state = multiworld.state_type(multiworld)
 
         def location_can_fill_item(location_to_fill: Location, item_to_fill: Item):
             return location_to_fill.can_fill(state, item_to_fill, check_access=False)
@@ -676,7 +806,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     else:
         logging.info(f'Balancing multiworld progression for {len(balanceable_players)} Players.')
         logging.debug(balanceable_players)
-        state: CollectionState = CollectionState(multiworld)
+        state: CollectionState = multiworld.state_type(multiworld)
+        search = SphereSearch(state, multiworld.get_locations())
         checked_locations: typing.Set[Location] = set()
         unchecked_locations: typing.Set[Location] = set(multiworld.get_locations())
 
@@ -698,6 +829,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         sphere_num: int = 1
         moved_item_count: int = 0
 
+        # The spheres after the current one found while looking ahead, along with whether the game was beaten before
+        # reaching them. They stay valid until items get moved, so are reused by the next spheres.
+        lookahead: typing.Optional[SphereSearch] = None
+        next_spheres: typing.List[typing.Tuple[typing.Set[Location], bool]] = []
+
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
             return {loc for loc in locations if sphere_state.can_reach(loc)}
@@ -705,6 +841,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
 
+        def look_ahead() -> None:
+            assert lookahead is not None
+            beaten = multiworld.has_beaten_game(lookahead.state)
+            next_sphere = lookahead.next_sphere()
+            for location in next_sphere:
+                if location.advancement:
+                    lookahead.collect(location)
+            next_spheres.append((next_sphere, beaten))
+
         # If there are no locations that aren't locked, there's no point in attempting to balance progression.
         if len(total_locations_count) == 0:
             return
@@ -713,7 +858,13 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if lookahead is not None and not next_spheres:
+                look_ahead()
+            if next_spheres:
+                sphere_locations = next_spheres.pop(0)[0]
+                search.discard(sphere_locations)
+            else:
+                sphere_locations = search.next_sphere()
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -743,16 +894,20 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
+                    if lookahead is None:
+                        lookahead = SphereSearch(state.copy(), unchecked_locations)
+                        for location in sphere_locations:
+                            if location.advancement:
+                                lookahead.collect(location)
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    while True:
+                    # Gather a set of locations which we can swap items into
+                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    for depth in itertools.count():
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -761,23 +916,20 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        if depth == len(next_spheres):
+                            look_ahead()
+                        balancing_sphere, beaten = next_spheres[depth]
                         for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
+                            unlocked_locations[location.player].add(location)
                             if not location.locked:
                                 balancing_reachables[location.player] += 1
-                        if multiworld.has_beaten_game(balancing_state) or all(
+                        if beaten or all(
                                 item_percentage(player, reachables) >= threshold_percentages[player]
                                 for player, reachables in balancing_reachables.items()
                                 if player in threshold_percentages):
                             break
                         elif not balancing_sphere:
                             raise RuntimeError('Not all required items reachable. Something went terribly wrong here.')
-                    # Gather a set of locations which we can swap items into
-                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
                     items_to_replace: typing.List[Location] = []
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
@@ -795,7 +947,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
 
-                            if multiworld.has_beaten_game(balancing_state):
+                            if beaten:
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
                             else:
@@ -824,15 +976,20 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 logging.debug(f"Progression balancing moved {new_location.item} to {new_location}, "
                                               f"displacing {old_location.item} into {old_location}")
                                 moved_item_count += 1
-                                state.collect(new_location.item, True, new_location)
+                                search.collect(new_location)
                                 break
                         else:
                             logging.warning(f"Could not Progression Balance {old_location.item}")
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        # the spheres found ahead don't match the new placements anymore
+                        lookahead = None
+                        next_spheres.clear()
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
-                        for location in get_sphere_locations(state, unlocked):
+                        unlocked_sphere = get_sphere_locations(state, unlocked)
+                        search.discard(unlocked_sphere)
+                        for location in unlocked_sphere:
                             unchecked_locations.remove(location)
                             if not location.locked:
                                 reachable_locations_count[location.player] += 1
@@ -840,7 +997,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
             for location in sphere_locations:
                 if location.advancement:
-                    state.collect(location.item, True, location)
+                    search.collect(location)
             checked_locations |= sphere_locations
 
             if multiworld.has_beaten_game(state):
@@ -30,8 +30,12 @@ import settings
 import Utils
 from Utils import (init_logging, is_frozen, is_linux, is_macos, is_windows, local_path, messagebox, open_filename,
                    user_path)
+from worlds.AutoWorld import AutoWorldRegister
 from worlds.LauncherComponents import Component, components, icon_paths, SuffixIdentifier, Type
 
+# worlds add their components and patch suffixes when imported, which the world manifest may have deferred
+AutoWorldRegister.world_types.load_all()
+
 
 def open_host_yaml():
     s = settings.get_settings()
@@ -2,15 +2,13 @@ import collections
 import concurrent.futures
 import logging
 import os
-import pickle
 import tempfile
 import time
 import zipfile
-import zlib
 from typing import Dict, List, Optional, Set, Tuple, Union
 
 import worlds
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, Region
+from BaseClasses import BitsetCollectionState, Item, Location, LocationProgressType, MultiWorld, Region
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, distribute_planned, \
     flood_items
 from Options import StartInventoryPool
@@ -21,6 +19,66 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
+# file signatures of formats that are compressed already, deflating them again only costs time
+_compressed_signatures = (
+    b"PK\x03\x04",  # zip, like patch containers
+    b"PK\x05\x06",  # empty zip
+    b"\x1f\x8b",  # gzip
+    b"BZh",  # bzip2
+    b"BSDIFF40",  # bsdiff4 patch, bzip2 compressed
+    b"\xfd7zXZ\x00",  # xz
+    b"\x28\xb5\x2f\xfd",  # zstandard
+    b"7z\xbc\xaf\x27\x1c",  # 7z
+    b"\x89PNG",
+    b"\xff\xd8\xff",  # jpeg
+)
+_compressed_extensions = (".archipelago",)
+
+
+class _OutputArchive:
+    """The final zip of a generation. Output files are added as soon as they are written, while others are still being
+    generated, and only get compressed if they are not compressed already.
+    It is written next to its final location and only moved there if all output was generated successfully."""
+
+    def __init__(self, path: str, compresslevel: int):
+        self.path = path
+        self.part_path = f"{path}.part"
+        self.zip = zipfile.ZipFile(self.part_path, mode="w", compression=zipfile.ZIP_DEFLATED,
+                                   compresslevel=compresslevel)
+        self.names: Set[str] = set()
+
+    def __enter__(self) -> "_OutputArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.zip.close()
+        if exc_type is None:
+            os.replace(self.part_path, self.path)
+        else:
+            os.unlink(self.part_path)
+
+    @staticmethod
+    def get_compress_type(path: str) -> int:
+        if path.endswith(_compressed_extensions):
+            return zipfile.ZIP_STORED
+        with open(path, "rb") as f:
+            signature = f.read(8)
+        return zipfile.ZIP_STORED if signature.startswith(_compressed_signatures) else zipfile.ZIP_DEFLATED
+
+    def add_file(self, path: str) -> None:
+        name = os.path.basename(path)
+        if name in self.names:
+            logging.warning(f"Multiple output files named {name}, only the first one is kept.")
+        else:
+            self.names.add(name)
+            self.zip.write(path, arcname=name, compress_type=self.get_compress_type(path))
+        os.unlink(path)
+
+    def add_folder(self, folder: str) -> None:
+        for file in sorted(os.scandir(folder), key=lambda entry: entry.name):
+            if file.is_file():
+                self.add_file(file.path)
+
 
 def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
     if not baked_server_options:
@@ -50,33 +108,38 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         from Options import dump_player_options
         dump_player_options(multiworld)
     multiworld.set_item_links()
-    multiworld.state = CollectionState(multiworld)
+    if get_settings().generator.bitset_state:
+        multiworld.state_type = BitsetCollectionState
+    multiworld.state = multiworld.state_type(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # listed from the world manifest, so worlds that are not played do not have to be imported
+    logger.info(f"Found {len(worlds.manifest)} World Types:")
+    longest_name = max(len(text) for text in worlds.manifest)
 
     max_item = 0
     max_location = 0
-    for cls in AutoWorld.AutoWorldRegister.world_types.values():
-        if cls.item_id_to_name:
-            max_item = max(max_item, max(cls.item_id_to_name))
-            max_location = max(max_location, max(cls.location_id_to_name))
+    for entry in worlds.manifest.values():
+        if entry["package"]["item_name_to_id"]:
+            max_item = max(max_item, max(entry["package"]["item_name_to_id"].values()))
+            max_location = max(max_location, max(entry["package"]["location_name_to_id"].values()))
 
     item_digits = len(str(max_item))
     location_digits = len(str(max_location))
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(entry["package"]["item_name_to_id"]) for entry in worlds.manifest.values())))
+    location_count = len(str(max(len(entry["package"]["location_name_to_id"]) for entry in worlds.manifest.values())))
     del max_item, max_location
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
-        if not cls.hidden and len(cls.item_names) > 0:
-            logger.info(f" {name:{longest_name}}: {len(cls.item_names):{item_count}} "
-                        f"Items (IDs: {min(cls.item_id_to_name):{item_digits}} - "
-                        f"{max(cls.item_id_to_name):{item_digits}}) | "
-                        f"{len(cls.location_names):{location_count}} "
-                        f"Locations (IDs: {min(cls.location_id_to_name):{location_digits}} - "
-                        f"{max(cls.location_id_to_name):{location_digits}})")
+    for name, entry in worlds.manifest.items():
+        item_ids = entry["package"]["item_name_to_id"].values()
+        location_ids = entry["package"]["location_name_to_id"].values()
+        if not entry["hidden"] and len(item_ids) > 0:
+            logger.info(f" {name:{longest_name}}: {len(item_ids):{item_count}} "
+                        f"Items (IDs: {min(item_ids):{item_digits}} - "
+                        f"{max(item_ids):{item_digits}}) | "
+                        f"{len(location_ids):{location_count}} "
+                        f"Locations (IDs: {min(location_ids):{location_digits}} - "
+                        f"{max(location_ids):{location_digits}})")
 
     del item_digits, location_digits, item_count, location_count
 
@@ -84,7 +147,11 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     if not args.skip_output:
         AutoWorld.call_stage(multiworld, "assert_generate")
 
-    AutoWorld.call_all(multiworld, "generate_early")
+    # worlds that declare it safe run their steps up to connect_entrances in parallel, if enabled in host.yaml
+    parallel_stages = get_settings().generator.parallel_stages
+    stage_pool = concurrent.futures.ThreadPoolExecutor(parallel_stages) if parallel_stages > 0 else None
+
+    AutoWorld.call_all(multiworld, "generate_early", pool=stage_pool)
 
     logger.info('')
 
@@ -111,7 +178,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
             del early
 
     logger.info('Creating MultiWorld.')
-    AutoWorld.call_all(multiworld, "create_regions")
+    AutoWorld.call_all(multiworld, "create_regions", pool=stage_pool)
 
     logger.info('Creating Items.')
     AutoWorld.call_all(multiworld, "create_items")
@@ -123,7 +190,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         multiworld.worlds[player].options.non_local_items.value -= multiworld.worlds[player].options.local_items.value
         multiworld.worlds[player].options.non_local_items.value -= set(multiworld.local_early_items[player])
 
-    AutoWorld.call_all(multiworld, "set_rules")
+    AutoWorld.call_all(multiworld, "set_rules", pool=stage_pool)
 
     for player in multiworld.player_ids:
         exclusion_rules(multiworld, player, multiworld.worlds[player].options.exclude_locations.value)
@@ -149,7 +216,9 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         multiworld.worlds[1].options.non_local_items.value = set()
         multiworld.worlds[1].options.local_items.value = set()
 
-    AutoWorld.call_all(multiworld, "connect_entrances")
+    AutoWorld.call_all(multiworld, "connect_entrances", pool=stage_pool)
+    if stage_pool:
+        stage_pool.shutdown()
     AutoWorld.call_all(multiworld, "generate_basic")
 
     # remove starting inventory from pool items.
@@ -224,24 +293,34 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + multiworld.seed_name
 
+    zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
+    logger.info(f"Creating final archive at {zipfilename}")
+
     output = tempfile.TemporaryDirectory()
-    with output as temp_dir:
+    with output as temp_dir, _OutputArchive(zipfilename, get_settings().generator.zip_compression_level) as archive:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
         with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
+            # each task writes into its own folder, so its files can be archived as soon as it is done
+            output_file_futures: Dict[concurrent.futures.Future, str] = {}
+
+            def submit_output(folder_name: str, function, *args) -> None:
+                folder = os.path.join(temp_dir, folder_name)
+                os.mkdir(folder)
+                output_file_futures[pool.submit(function, *args, folder)] = folder
+
+            submit_output("stage", AutoWorld.call_stage, multiworld, "generate_output")
             for player in output_players:
                 # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                submit_output(str(player), AutoWorld.call_single, multiworld, "generate_output", player)
 
             # collect ER hint info
             er_hint_data: Dict[int, Dict[int, str]] = {}
             AutoWorld.call_all(multiworld, 'extend_hint_information', er_hint_data)
 
-            def write_multidata():
+            def write_multidata(output_directory: str):
                 import NetUtils
                 from NetUtils import HintStatus
                 slot_data = {}
@@ -339,13 +418,10 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                with open(os.path.join(output_directory, f'{outfilebase}.archipelago'), 'wb') as f:
+                    f.write(NetUtils.encode_multidata(multidata))
 
-            output_file_futures.append(pool.submit(write_multidata))
+            submit_output("multidata", write_multidata)
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
@@ -357,20 +433,16 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 if i % 10 == 0 or i == len(output_file_futures):
                     logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
                 future.result()
+                archive.add_folder(output_file_futures[future])
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
             multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
-
-        zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
-        logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-            for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+            spoiler_path = os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase)
+            multiworld.spoiler.to_file(spoiler_path)
+            archive.add_file(spoiler_path)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -9,6 +9,7 @@ import datetime
 import functools
 import hashlib
 import inspect
+import io
 import itertools
 import logging
 import math
@@ -163,6 +164,154 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class EncodedGameData:
+    """JSON of game data packages, encoded once per checksum and shared by all rooms of the process,
+    so it can be spliced into DataPackage replies. Packages of installed worlds are read as stored by the world
+    manifest, so they don't have to be encoded at all."""
+    max_size: int = 128
+    """amount of encoded data packages to keep, least recently used ones are dropped first"""
+
+    def __init__(self):
+        self.fragments: typing.OrderedDict[str, str] = collections.OrderedDict()
+
+    def get(self, game: str, game_data: typing.Dict[str, typing.Any]) -> str:
+        checksum = game_data.get("checksum", None)
+        if checksum is None:  # rolled before data packages had checksums, can't tell if it's the same data
+            return encode(game_data)
+        fragment = self.fragments.get(checksum, None)
+        if fragment is None:
+            if "item_name_groups" not in game_data and "location_name_groups" not in game_data:
+                # stored packages are content addressed and in the form sent to clients
+                fragment = Utils.load_encoded_data_package_for_checksum(game, checksum)
+            if fragment is None:
+                fragment = encode(game_data)
+            self.fragments[checksum] = fragment
+            if len(self.fragments) > self.max_size:
+                self.fragments.popitem(last=False)
+        else:
+            self.fragments.move_to_end(checksum)
+        return fragment
+
+
+encoded_game_data = EncodedGameData()
+
+
+class SaveJournal:
+    """Tracks changes to the save state of a Context, so saving can append them to a journal as a small frame,
+    instead of pickling the whole state every time. Once the journal outgrows the last snapshot, or a write failed,
+    the next save compacts it into a new snapshot."""
+    min_compaction_size: int = 1024 * 1024
+    """journal size in bytes below which it does not get compacted, even if it is bigger than the snapshot"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.changes: typing.Dict[typing.Tuple[str, typing.Hashable], None] = {}
+        self.location_checks: typing.Dict[team_slot, typing.Set[int]] = {}
+        self.received_lengths: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.extras: typing.Dict[str, typing.Any] = {}
+        self.generation = 0
+        self.snapshot_size = 0
+        self.journal_size = 0
+        self.intact = False  # False until a snapshot is written, or after a write was interrupted
+
+    @property
+    def compaction_due(self) -> bool:
+        return not self.intact or self.journal_size >= max(self.snapshot_size, self.min_compaction_size)
+
+    def change(self, section: str, key: typing.Hashable) -> None:
+        """Remember that savedata[section][key] changed. Its value is read when the next frame is written."""
+        with self.lock:
+            self.changes[section, key] = None
+
+    def check_locations(self, team: int, slot: int, locations: typing.Set[int]) -> None:
+        with self.lock:
+            self.location_checks.setdefault((team, slot), set()).update(locations)
+
+    def _take(self) -> typing.Tuple[typing.Dict[typing.Tuple[str, typing.Hashable], None],
+                                    typing.Dict[team_slot, typing.Set[int]]]:
+        with self.lock:
+            changes, self.changes = self.changes, {}
+            location_checks, self.location_checks = self.location_checks, {}
+        return changes, location_checks
+
+    def snapshot(self, ctx: Context) -> bytes:
+        """Pickles the full save state of ctx, which supersedes all previous frames once written."""
+        self.intact = False
+        self._take()
+        self.generation += 1
+        savedata = ctx.get_save()
+        savedata["journal_generation"] = self.generation
+        self.received_lengths = {key: len(items) for key, items in ctx.received_items.items()}
+        self.extras = ctx.get_save_extras()
+        return pickle.dumps(savedata)
+
+    def frame(self, ctx: Context) -> bytes:
+        """Pickles the changes to the save state of ctx since the last frame or snapshot.
+        Returns empty bytes if there are none."""
+        self.intact = False
+        changes, location_checks = self._take()
+        records: typing.List[typing.Tuple[str, typing.Hashable, typing.Any]] = [
+            ("location_checks", key, locations) for key, locations in location_checks.items()]
+        for key, items in list(ctx.received_items.items()):
+            written = self.received_lengths.get(key, 0)
+            if len(items) > written:
+                records.append(("received_items", key, (written, items[written:])))
+                self.received_lengths[key] = len(items)
+        for section, key in changes:
+            records.append((section, key, ctx.get_save_value(section, key)))
+        extras = ctx.get_save_extras()
+        for section, value in extras.items():
+            if self.extras.get(section) != value:
+                records.append((section, None, value))
+        self.extras = extras
+        if not records:
+            self.intact = True
+            return b""
+        return pickle.dumps((self.generation, records))
+
+    def written(self, data: bytes, snapshot: bool) -> None:
+        """Call once data returned by snapshot or frame was successfully stored."""
+        if snapshot:
+            self.snapshot_size = len(data)
+            self.journal_size = 0
+        else:
+            self.journal_size += len(data)
+        self.intact = True
+
+    @staticmethod
+    def replay(savedata: typing.Dict[str, typing.Any], journal: bytes) -> typing.Dict[str, typing.Any]:
+        """Applies the frames in journal, that belong to the snapshot savedata, to it in place."""
+        generation = savedata.get("journal_generation", None)
+        if generation is None or not journal:
+            return savedata
+        activity_timers = dict(savedata["client_activity_timers"])
+        stream = io.BytesIO(journal)
+        unpickler = Utils.RestrictedUnpickler(stream)
+        while stream.tell() < len(journal):
+            try:
+                frame_generation, records = unpickler.load()
+            except Exception as e:
+                # most likely the process ended during a write, so everything before is still fine
+                logging.warning(f"Ignoring incomplete save journal frame ({e}).")
+                break
+            if frame_generation != generation:
+                continue  # belongs to an older snapshot
+            for section, key, value in records:
+                if section == "location_checks":
+                    savedata[section].setdefault(key, set()).update(value)
+                elif section == "received_items":
+                    index, items = value
+                    savedata[section].setdefault(key, [])[index:] = items
+                elif section == "client_activity_timers":
+                    activity_timers[key] = value
+                elif key is None:
+                    savedata[section] = value
+                else:
+                    savedata[section][key] = value
+        savedata["client_activity_timers"] = tuple(activity_timers.items())
+        return savedata
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -178,6 +327,9 @@ class Context:
                       "compatibility": int}
     # team -> slot id -> list of clients authenticated to slot.
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
+    # (team, game or tag) -> clients authenticated to a slot of that game or with that tag, for Bounce routing.
+    clients_by_game: typing.Dict[typing.Tuple[int, str], typing.Set[Client]]
+    clients_by_tag: typing.Dict[typing.Tuple[int, str], typing.Set[Client]]
     endpoints: list[Client]
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
@@ -199,6 +351,8 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    sphere_index: typing.Dict[int, typing.Dict[int, int]]
+    """ { player: { location_id: sphere, ... } } """
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
@@ -211,6 +365,9 @@ class Context:
         self.log_network = log_network
         self.endpoints = []
         self.clients = {}
+        self.clients_by_game = collections.defaultdict(set)
+        self.clients_by_tag = collections.defaultdict(set)
+        self.dirty_item_slots: typing.Set[team_slot] = set()  # slots that received items not yet sent to clients
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
@@ -234,6 +391,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding_player, location) -> hints that are not found yet
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -252,6 +411,7 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.save_journal: typing.Optional[SaveJournal] = None
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -263,6 +423,8 @@ class Context:
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
         self.spheres = []
+        self.sphere_index = {}
+        self.room_info_fragment: typing.Optional[str] = None
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -282,7 +444,12 @@ class Context:
     # Data package retrieval
     def _load_game_data(self):
         import worlds
-        self.gamespackage = worlds.network_data_package["games"]
+        # remove groups from data sent to clients, without changing the shared data package
+        self.gamespackage = {
+            world_name: {key: value for key, value in game_package.items()
+                         if key not in ("item_name_groups", "location_name_groups")}
+            for world_name, game_package in worlds.network_data_package["games"].items()
+        }
 
         self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
                                  worlds.AutoWorldRegister.world_types.items()}
@@ -291,11 +458,6 @@ class Context:
         for world_name, world in worlds.AutoWorldRegister.world_types.items():
             self.non_hintable_names[world_name] = world.hint_blacklist
 
-        for game_package in self.gamespackage.values():
-            # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
-
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
             if "checksum" in game_package:
@@ -395,13 +557,77 @@ class Context:
         msgs = self.dumper(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
+    def get_data_package_msg(self, games: typing.Iterable[str]) -> str:
+        """Encoded DataPackage message for games, spliced together from the cached JSON of each game."""
+        return '[{"cmd":"DataPackage","data":{"games":{' + ",".join(
+            self.dumper(game) + ":" + encoded_game_data.get(game, self.gamespackage[game]) for game in games) + "}}}]"
+
+    def get_room_info_msg(self) -> str:
+        """Encoded RoomInfo message. The parts that can't change after loading are only encoded once."""
+        if self.room_info_fragment is None:
+            games = {self.games[x] for x in range(1, len(self.games) + 1)}
+            games.add("Archipelago")
+            self.room_info_fragment = self.dumper({
+                "games": games,
+                # tags are for additional features in the communication.
+                # Name them by feature or fork, as you feel is appropriate.
+                "tags": self.tags,
+                "version": version_tuple,
+                "generator_version": self.generator_version,
+                "datapackage_checksums": {game: game_data["checksum"] for game, game_data
+                                          in self.gamespackage.items() if game in games and "checksum" in game_data},
+                "seed_name": self.seed_name,
+            })[1:-1]
+        msg = self.dumper([{
+            "cmd": "RoomInfo",
+            "password": bool(self.password),
+            "permissions": get_permissions(self),
+            "hint_cost": self.hint_cost,
+            "location_check_points": self.location_check_points,
+            "time": time.time(),
+        }])
+        return msg[:-2] + "," + self.room_info_fragment + "}]"
+
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
             self.endpoints.remove(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
+            self.unindex_client(endpoint)
         await on_client_disconnected(self, endpoint)
 
+    def index_client(self, client: Client):
+        """Adds an authenticated client to the Bounce routing indexes, by its current team, game and tags."""
+        self.clients_by_game[client.team, self.games[client.slot]].add(client)
+        for tag in client.tags:
+            if isinstance(tag, str):
+                self.clients_by_tag[client.team, tag].add(client)
+
+    def unindex_client(self, client: Client):
+        """Removes a client from the Bounce routing indexes. Has to be called before its team, slot or tags change."""
+        keys = [(self.clients_by_game, self.games[client.slot])]
+        keys += [(self.clients_by_tag, tag) for tag in client.tags if isinstance(tag, str)]
+        for index, key in keys:
+            clients = index.get((client.team, key), None)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del index[client.team, key]
+
+    def get_bounce_targets(self, team: int, games: typing.Iterable[str], tags: typing.Iterable[str],
+                           slots: typing.Iterable[int]) -> typing.Set[Client]:
+        """All clients of team that play one of games, have one of tags or are connected to one of slots."""
+        targets: typing.Set[Client] = set()
+        for index, keys in ((self.clients_by_game, games), (self.clients_by_tag, tags)):
+            for key in keys:
+                clients = index.get((team, key), None)
+                if clients:
+                    targets |= clients
+        team_clients = self.clients[team]
+        for slot in slots:
+            targets.update(team_clients.get(slot, ()))
+        return targets
+
     def notify_client(self, client: Client, text: str, additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
@@ -434,15 +660,28 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > NetUtils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == NetUtils.multidata_format_version:
+            return NetUtils.MultiData(data)  # sections are only unpacked once they are used
         return restricted_loads(zlib.decompress(data[1:]))
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
-              use_embedded_server_options: bool):
-
+    @staticmethod
+    def build_sphere_index(spheres: typing.List[typing.Dict[int, typing.Set[int]]]
+                           ) -> typing.Dict[int, typing.Dict[int, int]]:
+        """Inverts spheres to { player: { location_id: sphere, ... } }."""
+        index: typing.Dict[int, typing.Dict[int, int]] = {}
+        for i, sphere in enumerate(spheres):
+            for player, locations in sphere.items():
+                index.setdefault(player, {}).update(dict.fromkeys(locations, i))
+        return index
+
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any],
+              game_data_packages: typing.Dict[str, typing.Any], use_embedded_server_options: bool):
+
+        self.room_info_fragment = None
         self.read_data = {}
         # there might be a better place to put this.
         self.read_data["race_mode"] = lambda: decoded_obj.get("race_mode", 0)
@@ -478,7 +717,10 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        if isinstance(decoded_obj, NetUtils.MultiData):
+            self.locations = decoded_obj.pop_location_store()  # built straight from the stored rows
+        else:
+            self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
         self.slot_data = decoded_obj['slot_data']
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
@@ -491,6 +733,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.rebuild_hint_index()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -521,6 +764,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.sphere_index = self.build_sphere_index(self.spheres)
 
     # saving
 
@@ -537,18 +781,55 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            self._write_save()
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
-    def init_save(self, enabled: bool = True):
+    def _write_save(self):
+        """Writes the save state, either as a full snapshot or by appending the changes to the save journal."""
+        if self.save_journal is None:
+            self._write_snapshot(pickle.dumps(self.get_save()))
+        elif self.save_journal.compaction_due:
+            data = self.save_journal.snapshot(self)
+            self._write_snapshot(data)
+            self.save_journal.written(data, True)
+        else:
+            data = self.save_journal.frame(self)
+            if data:
+                self._append_journal(data)
+                self.save_journal.written(data, False)
+
+    @property
+    def journal_filename(self) -> str:
+        return self.save_filename + ".journal"
+
+    def _write_snapshot(self, data: bytes):
+        """Stores a pickled save, replacing the previous one and its journal."""
+        import os
+        with open(self.save_filename, "wb") as f:
+            f.write(zlib.compress(data))
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+
+    def _append_journal(self, data: bytes):
+        with open(self.journal_filename, "ab") as f:
+            f.write(data)
+
+    def _read_journal(self) -> bytes:
+        try:
+            with open(self.journal_filename, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def init_save(self, enabled: bool = True, journal: bool = False):
         self.saving = enabled
         if self.saving:
+            if journal:
+                self.save_journal = SaveJournal()
             if not self.save_filename:
                 import os
                 name, ext = os.path.splitext(self.data_filename)
@@ -557,7 +838,7 @@ class Context:
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                    self.set_save(SaveJournal.replay(save_data, self._read_journal()))
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -596,7 +877,6 @@ class Context:
                 atexit.register(self._save, True)  # make sure we save on exit too
 
     def get_save(self) -> dict:
-        self.recheck_hints()
         d = {
             "version": self.save_version,
             "connect_names": self.connect_names,
@@ -604,24 +884,42 @@ class Context:
             "hints_used": dict(self.hints_used),
             "hints": dict(self.hints),
             "location_checks": dict(self.location_checks),
-            "name_aliases": self.name_aliases,
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_activity_timers.items()),
+            "stored_data": self.stored_data,
+            **self.get_save_extras()
+        }
+
+        return d
+
+    def get_save_extras(self) -> dict:
+        """Parts of the save that rarely change and stay small, so the save journal compares and rewrites them
+        as a whole instead of tracking each change."""
+        return {
+            "name_aliases": dict(self.name_aliases),
             "client_connection_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
-            "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
+            "group_collected": {group: set(slots) for group, slots in self.group_collected.items()},
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
                              "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
                              "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
         }
 
-        return d
+    def get_save_value(self, section: str, key: typing.Hashable) -> typing.Any:
+        """Value of savedata[section][key] as get_save would store it, for sections tracked by the save journal."""
+        if section == "client_activity_timers":
+            return self.client_activity_timers[key].timestamp()
+        value = getattr(self, section)[key]
+        return set(value) if section == "hints" else value
+
+    def journal_change(self, section: str, key: typing.Hashable) -> None:
+        """Notes a change to savedata[section][key] for the save journal, if journaling is enabled."""
+        if self.save_journal:
+            self.save_journal.change(section, key)
 
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
@@ -631,6 +929,7 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        self.rebuild_hint_index()
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -659,6 +958,9 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+
+        if self.save_journal:
+            self.save_journal.generation = savedata.get("journal_generation", 0)
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -688,6 +990,7 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.unindex_hint(hint_team, hint)
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -695,6 +998,41 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes the hints for the specified locations of team/slot, which got checked.
+        If a set is passed for 'changed', each (team,slot) pair that has at least one hint modified will be added."""
+        for location in locations:
+            hints = self.hint_index.pop((team, slot, location), None)
+            if not hints:
+                continue
+            for hint in hints:
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    if changed is not None:
+                        changed.add((team, player))
+                    self.replace_hint(team, player, hint, new_hint)
+
+    def index_hint(self, team: int, hint: Hint) -> None:
+        if not hint.found:
+            self.hint_index.setdefault((team, hint.finding_player, hint.location), set()).add(hint)
+
+    def unindex_hint(self, team: int, hint: Hint) -> None:
+        key = (team, hint.finding_player, hint.location)
+        hints = self.hint_index.get(key, None)
+        if hints is not None:
+            hints.discard(hint)
+            if not hints:
+                del self.hint_index[key]
+
+    def rebuild_hint_index(self) -> None:
+        self.hint_index = {}
+        for (team, _), hints in self.hints.items():
+            for hint in hints:
+                self.index_hint(team, hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
@@ -702,9 +1040,9 @@ class Context:
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.sphere_index.get(player, {}).get(location_id)
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
@@ -764,6 +1102,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.index_hint(team, hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -791,6 +1130,8 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.unindex_hint(team, old_hint)
+            self.index_hint(team, new_hint)
     
     # "events"
 
@@ -812,12 +1153,14 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
+        self.journal_change("hints", (team, slot))
         key: str = f"_read_hints_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
+        self.journal_change("client_game_state", (team, slot))
         key: str = f"_read_client_status_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
@@ -858,31 +1201,7 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
 
 
 async def on_client_connected(ctx: Context, client: Client):
-    players = []
-    for team, clients in ctx.clients.items():
-        for slot, connected_clients in clients.items():
-            if connected_clients:
-                name = ctx.player_names[team, slot]
-                players.append(NetworkPlayer(team, slot, ctx.name_aliases.get((team, slot), name), name))
-    games = {ctx.games[x] for x in range(1, len(ctx.games) + 1)}
-    games.add("Archipelago")
-    await ctx.send_msgs(client, [{
-        'cmd': 'RoomInfo',
-        'password': bool(ctx.password),
-        'games': games,
-        # tags are for additional features in the communication.
-        # Name them by feature or fork, as you feel is appropriate.
-        'tags': ctx.tags,
-        'version': version_tuple,
-        'generator_version': ctx.generator_version,
-        'permissions': get_permissions(ctx),
-        'hint_cost': ctx.hint_cost,
-        'location_check_points': ctx.location_check_points,
-        'datapackage_checksums': {game: game_data["checksum"] for game, game_data
-                                  in ctx.gamespackage.items() if game in games and "checksum" in game_data},
-        'seed_name': ctx.seed_name,
-        'time': time.time(),
-    }])
+    await ctx.send_encoded_msgs(client, ctx.get_room_info_msg())
 
 
 def get_permissions(ctx) -> typing.Dict[str, Permission]:
@@ -1013,20 +1332,22 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends the new items of the slots in ctx.dirty_item_slots to their clients.
+    All items sent to a slot since the last call reach each of its clients as a single ReceivedItems."""
+    dirty_slots, ctx.dirty_item_slots = ctx.dirty_item_slots, set()
+    for team, slot in dirty_slots:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                async_start(ctx.send_msgs(client, [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1074,6 +1395,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.dirty_item_slots.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1084,6 +1406,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
     if new_locations:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
+            ctx.journal_change("client_activity_timers", (team, slot))
 
         sortable: list[tuple[int, int, int, int]] = []
         for location in new_locations:
@@ -1111,6 +1434,8 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.check_locations(team, slot, new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1118,7 +1443,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1583,6 +1908,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.dirty_item_slots.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1604,6 +1930,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             hints = {hint.re_check(self.ctx, self.client.team) for hint in
                      self.ctx.hints[self.client.team, self.client.slot]}
             self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.journal_change("hints", (self.client.team, self.client.slot))
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1693,6 +2020,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.journal_change("hints_used", (self.client.team, self.client.slot))
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1812,6 +2140,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             team, slot = ctx.connect_names[args['name']]
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
+                ctx.unindex_client(client)
                 if client.team != team or client.slot != slot:
                     client.auth = False  # swapping Team/Slot
             client.team = team
@@ -1824,6 +2153,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.no_locations = "TextOnly" in client.tags or "Tracker" in client.tags
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
+            ctx.index_client(client)
             connected_packet = {
                 "cmd": "Connected",
                 "team": client.team, "slot": client.slot,
@@ -1849,23 +2179,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            games = set(args.get("games", []))
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(
+                name for name in ctx.gamespackage if name in games))
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(
+                name for name in ctx.gamespackage if name not in exclusions))
 
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(ctx.gamespackage))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1893,7 +2217,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.unindex_client(client)
                 client.tags = args["tags"]
+                ctx.index_client(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = 'TextOnly' in client.tags or 'Tracker' in client.tags
                     client.no_text = "NoText" in client.tags or (
@@ -2000,13 +2326,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             tags = set(args.get("tags", []))
             slots = set(args.get("slots", []))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
-
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            targets = ctx.get_bounce_targets(client.team, games, tags, slots)
+            if targets:
+                await ctx.broadcast_send_encoded_msgs(targets, ctx.dumper([args]))
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2036,6 +2358,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.journal_change("stored_data", args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", True):
                 targets.add(client)
@@ -2421,6 +2744,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--save_journal', default=defaults["save_journal"], action='store_true',
+                        help="Append changes to a journal next to the save file, instead of rewriting the full save.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2544,7 +2869,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
-    ctx.init_save(not args.disable_save)
+    ctx.init_save(not args.disable_save, args.save_journal)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
@@ -4,6 +4,7 @@ import typing
 import enum
 import warnings
 from json import JSONEncoder, JSONDecoder
+from json.encoder import encode_basestring
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
@@ -113,7 +114,44 @@ _encode = JSONEncoder(
 ).encode
 
 
+_encode_str = encode_basestring  # what _encode uses for str, without its per call overhead
+_network_item_json = '{"item":%d,"location":%d,"player":%d,"flags":%d,"class":"NetworkItem"}'
+_sequence_types = {list, tuple, set, frozenset}
+
+
+def _encode_value(obj: typing.Any) -> str:
+    """Encodes the most common message field values without copying them through _scan_for_TypedTuples first."""
+    cls = type(obj)
+    if cls is str:
+        return _encode_str(obj)
+    if cls is int:
+        return int.__repr__(obj)
+    if cls is NetworkItem:
+        return _network_item_json % obj
+    if cls in _sequence_types and obj:
+        first = type(next(iter(obj)))
+        if first is NetworkItem and all(type(o) is NetworkItem for o in obj):
+            return "[" + ",".join([_network_item_json % o for o in obj]) + "]"
+        if first is int and all(type(o) is int for o in obj):
+            return _encode(obj if cls is list or cls is tuple else list(obj))
+    return _encode(_scan_for_TypedTuples(obj))
+
+
+def _has_long_sequence(msg: typing.Any) -> bool:
+    # encoding field by field only pays off if there are long sequences, for example of NetworkItem, to skip copying
+    return type(msg) is dict and any(type(value) in _sequence_types and len(value) > 8 for value in msg.values()) \
+        and all(type(key) is str for key in msg)
+
+
+def _encode_message(msg: typing.Any) -> str:
+    if _has_long_sequence(msg):
+        return "{" + ",".join([_encode_str(key) + ":" + _encode_value(value) for key, value in msg.items()]) + "}"
+    return _encode(_scan_for_TypedTuples(msg))
+
+
 def encode(obj: typing.Any) -> str:
+    if type(obj) is list and any(_has_long_sequence(msg) for msg in obj):  # list of messages
+        return "[" + ",".join([_encode_message(msg) for msg in obj]) + "]"
     return _encode(_scan_for_TypedTuples(obj))
 
 
@@ -148,7 +186,16 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
-decode = JSONDecoder(object_hook=_object_hook).decode
+_decode = JSONDecoder(object_hook=_object_hook).decode
+_decode_plain = JSONDecoder().decode
+
+
+def decode(s: str) -> typing.Any:
+    # _object_hook only acts on objects with a "class" key, which most messages, like LocationChecks or Set, lack.
+    # A "class" key can only be spelled differently through escape sequences, so any of those keeps the hook.
+    if '"class"' in s or "\\" in s:
+        return _decode(s)
+    return _decode_plain(s)
 
 
 class Endpoint:
@@ -391,7 +438,12 @@ class Hint(typing.NamedTuple):
 
 
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
-    def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
+    # optional reverse index, built once on load. The store is not modified afterwards in MultiServer.
+    # receiver -> [(item, order, sender, location, flags)] sorted by item, order being the position in a full scan
+    _by_receiver: typing.Optional[typing.Dict[int, typing.List[typing.Tuple[int, int, int, int, int]]]] = None
+
+    def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]],
+                 indexed: bool = True):
         super().__init__(values)
 
         if not self:
@@ -403,8 +455,52 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+        if indexed:
+            self._build_index()
+
+    @classmethod
+    def from_rows(cls, rows: typing.Sequence[int], players: int, indexed: bool = True) -> "_LocationStore":
+        """Builds the store from a flat int64 buffer of (sender, location, item, receiver, flags) rows,
+        sorted by sender and location, as stored in multidata. players is the amount of senders."""
+        return cls(locations_from_rows(rows, players), indexed)
+
+    def _build_index(self) -> None:
+        by_receiver: typing.Dict[int, typing.List[typing.Tuple[int, int, int, int, int]]] = {}
+        order = 0
+        for finding_player, check_data in self.items():
+            for location_id, (item_id, receiving_player, item_flags) in check_data.items():
+                by_receiver.setdefault(receiving_player, []).append(
+                    (item_id, order, finding_player, location_id, item_flags))
+                order += 1
+        for entries in by_receiver.values():
+            entries.sort()
+        self._by_receiver = by_receiver
+
+    def get_size(self) -> int:
+        from sys import getsizeof
+        size = getsizeof(self) + sum(getsizeof(locations) for locations in self.values())
+        if self._by_receiver is not None:
+            size += getsizeof(self._by_receiver)
+            for entries in self._by_receiver.values():
+                size += getsizeof(entries) + sum(getsizeof(entry) + getsizeof(entry[1]) for entry in entries)
+        return size
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        if self._by_receiver is not None:
+            import bisect
+            from operator import itemgetter
+            found: typing.List[typing.Tuple[int, int, int, int, int]] = []
+            for slot in slots:
+                entries = self._by_receiver.get(slot, ())
+                start = bisect.bisect_left(entries, seeked_item_id, key=itemgetter(0))
+                end = bisect.bisect_right(entries, seeked_item_id, lo=start, key=itemgetter(0))
+                found.extend((slot, entry) for entry in entries[start:end])
+            if len(slots) > 1:
+                found.sort(key=lambda hit: hit[1][1])  # same order as a full scan
+            for receiving_player, (item_id, _, finding_player, location_id, item_flags) in found:
+                yield finding_player, location_id, item_id, receiving_player, item_flags
+            return
         for finding_player, check_data in self.items():
             for location_id, (item_id, receiving_player, item_flags) in check_data.items():
                 if receiving_player in slots and item_id == seeked_item_id:
@@ -413,6 +509,12 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
+        if self._by_receiver is not None:
+            # sorted to get the same order as a full scan
+            entries = sorted(self._by_receiver.get(slot, ()), key=lambda entry: entry[1])
+            for _, _, source_slot, location_id, _ in entries:
+                all_locations[source_slot].add(location_id)
+            return all_locations
         for source_slot, location_data in self.items():
             for location_id, values in location_data.items():
                 if values[1] == slot:
@@ -472,3 +574,161 @@ else:
             warnings.warn("_speedups not available. Falling back to pure python LocationStore. "
                           "Install a matching C++ compiler for your platform to compile _speedups.")
             LocationStore = _LocationStore
+
+
+def locations_to_rows(locations: typing.Mapping[int, typing.Mapping[int, typing.Sequence[int]]]) -> "array.array[int]":
+    """Flattens { sender: { location: (item, receiver, flags) } } to sorted int64 rows of
+    (sender, location, item, receiver, flags), the format LocationStore.from_rows takes."""
+    import array
+    rows = array.array("q")
+    for sender, sender_locations in sorted(locations.items()):
+        for location, (item, receiver, flags) in sorted(sender_locations.items()):
+            rows.extend((sender, location, item, receiver, flags))
+    return rows
+
+
+def locations_from_rows(rows: typing.Sequence[int], players: int
+                        ) -> typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]:
+    locations: typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]] = {
+        player: {} for player in range(1, players + 1)}
+    row_iter = iter(rows)
+    for sender, location, item, receiver, flags in zip(row_iter, row_iter, row_iter, row_iter, row_iter):
+        locations[sender][location] = item, receiver, flags
+    return locations
+
+
+multidata_format_version = 4
+"""first byte of .archipelago files. Up to 3 the rest is a zlib compressed pickle of the multidata dict,
+4 is a container of separately compressed sections, see MultiData."""
+multidata_sections = ("locations", "spheres", "slot_data", "precollected_hints", "er_hint_data", "datapackage")
+"""multidata keys that get their own section, all other keys go into a shared "base" section"""
+multidata_compresslevel = 1
+"""zlib level of multidata sections. Multidata is mostly ids and pickle opcodes, higher levels barely shrink it."""
+
+
+class MultiData(typing.MutableMapping[str, typing.Any]):
+    """Multidata of format version 4, which only decompresses and unpickles a section once one of its keys is used,
+    so for example a tracker never unpickles slot_data it does not show.
+
+    Layout: the version byte, the little endian uint32 length of a JSON header and then the compressed sections.
+    The header maps each key to its section and each section to its offset and size after the header.
+    Locations are stored as rows for LocationStore.from_rows instead of a pickle, see locations_to_rows: native int64
+    (sender, location, item, receiver, flags) rows, sorted by sender and location."""
+
+    def __init__(self, data: bytes):
+        import json
+        if data[0] != multidata_format_version:
+            raise ValueError(f"Multidata of format {data[0]} is not a sectioned container.")
+        header_size = int.from_bytes(data[1:5], "little")
+        header = json.loads(data[5:5 + header_size])
+        self._data = memoryview(data)[5 + header_size:]
+        self._sections: typing.Dict[str, typing.Tuple[int, int]] = {
+            name: (offset, size) for name, (offset, size) in header["sections"].items()}
+        self._keys: typing.Dict[str, str] = header["keys"]
+        self._players: int = header["players"]
+        self._values: typing.Dict[str, typing.Any] = {}
+        self._loaded: typing.Set[str] = set()
+        self.decoded_size = 0
+        """uncompressed size of the sections decoded so far"""
+
+    def _read(self, section: str) -> bytes:
+        import zlib
+        offset, size = self._sections[section]
+        return zlib.decompress(self._data[offset:offset + size])
+
+    def _load(self, section: str) -> None:
+        from Utils import restricted_loads
+        if section in self._loaded:
+            return
+        data = self._read(section)
+        if section == "locations":
+            import array
+            rows = array.array("q")
+            rows.frombytes(data)
+            self._values["locations"] = locations_from_rows(rows, self._players)
+        elif section == "base":
+            self._values.update(restricted_loads(data))
+        else:
+            self._values[section] = restricted_loads(data)
+        self._loaded.add(section)
+        self.decoded_size += len(data)
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key not in self._values:
+            self._load(self._keys[key])
+        return self._values[key]
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        section = self._keys.setdefault(key, key if key in multidata_sections else "base")
+        if section == "base" and section in self._sections:
+            self._load(section)  # the other keys of the section have to be encoded again along with it
+        self._loaded.add(section)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        section = self._keys[key]
+        if section == "base" and section in self._sections:
+            self._load(section)
+        self._loaded.add(section)
+        del self._keys[key]
+        self._values.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys  # without loading the section
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def pop_location_store(self, indexed: bool = True) -> LocationStore:
+        """Removes locations and returns them as a LocationStore, built straight from the stored rows if possible."""
+        if "locations" in self._loaded:
+            return LocationStore(self.pop("locations"), indexed)
+        import array
+        del self["locations"]
+        rows = array.array("q")
+        rows.frombytes(self._read("locations"))
+        return LocationStore.from_rows(rows, self._players, indexed)
+
+    def encode(self) -> bytes:
+        """Encodes the multidata again, copying sections that were not loaded as they are."""
+        reused = {section: self._data[offset:offset + size] for section, (offset, size) in self._sections.items()
+                  if section not in self._loaded and section in self._keys.values()}
+        return _encode_multidata(self, reused, self._players)
+
+
+def encode_multidata(multidata: typing.Mapping[str, typing.Any]) -> bytes:
+    """Encodes multidata as a sectioned container of the current format version, see MultiData."""
+    return _encode_multidata(multidata, {}, len(multidata["locations"]))
+
+
+def _encode_multidata(multidata: typing.Mapping[str, typing.Any], reused: typing.Mapping[str, bytes],
+                      players: int) -> bytes:
+    import json
+    import pickle
+    import zlib
+    keys = {key: key if key in multidata_sections else "base" for key in multidata}
+    base = {}
+    payloads: typing.Dict[str, bytes] = dict(reused)
+    for key, section in keys.items():
+        if section in reused:
+            continue
+        if section == "base":
+            base[key] = multidata[key]
+        elif section == "locations":
+            payloads[section] = zlib.compress(locations_to_rows(multidata[key]).tobytes(), multidata_compresslevel)
+        else:
+            payloads[section] = zlib.compress(pickle.dumps(multidata[key]), multidata_compresslevel)
+    if base:
+        payloads["base"] = zlib.compress(pickle.dumps(base), multidata_compresslevel)
+
+    sections: typing.Dict[str, typing.Tuple[int, int]] = {}
+    offset = 0
+    for section, payload in payloads.items():
+        sections[section] = offset, len(payload)
+        offset += len(payload)
+    header = json.dumps({"keys": keys, "sections": sections, "players": players}).encode()
+    return b"".join((bytes([multidata_format_version]), len(header).to_bytes(4, "little"), header,
+                     *payloads.values()))
@@ -339,11 +339,15 @@ def get_file_safe_name(name: str) -> str:
     return "".join(c for c in name if c not in '<>:"/\\|?*')
 
 
+def _data_package_path(game: str, checksum: str) -> str:
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    return cache_path("datapackage", get_file_safe_name(game), f"{checksum}.json")
+
+
 def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Dict[str, Any]:
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        path = cache_path("datapackage", get_file_safe_name(game), f"{checksum}.json")
+        path = _data_package_path(game, checksum)
         if os.path.exists(path):
             try:
                 with open(path, "r", encoding="utf-8-sig") as f:
@@ -360,18 +364,42 @@ def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) ->
     return {}
 
 
-def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
-    checksum = data.get("checksum")
+def load_encoded_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Optional[str]:
+    """Returns the cached data package for checksum as the JSON it was stored as.
+    It is only decoded once to make sure it is the complete package for checksum."""
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        game_folder = cache_path("datapackage", get_file_safe_name(game))
-        os.makedirs(game_folder, exist_ok=True)
         try:
-            with open(os.path.join(game_folder, f"{checksum}.json"), "w", encoding="utf-8-sig") as f:
-                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            with open(_data_package_path(game, checksum), "r", encoding="utf-8-sig") as f:
+                encoded = f.read()
+            if json.loads(encoded).get("checksum") == checksum:
+                return encoded
+            logging.debug(f"Stored data package for {game} does not match checksum {checksum}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logging.debug(f"Could not store data package: {e}")
+            logging.debug(f"Could not load data package: {e}")
+    return None
+
+
+def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
+    checksum = data.get("checksum")
+    if checksum and game:
+        store_encoded_data_package_for_checksum(game, checksum,
+                                                json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+def store_encoded_data_package_for_checksum(game: str, checksum: str, encoded: str) -> None:
+    """Stores an already encoded data package, so it can be sent on without encoding it again.
+    The file is replaced atomically, as other processes may be reading it."""
+    path = _data_package_path(game, checksum)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(encoded)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logging.debug(f"Could not store data package: {e}")
 
 
 def get_default_adjuster_settings(game_name: str) -> Namespace:
@@ -29,6 +29,10 @@ app.config["SELFLAUNCH"] = True  # application process is in charge of launching
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
 app.config["SELFGEN"] = True  # application process is in charge of scheduling Generations.
+app.config["SAVE_JOURNAL"] = False  # Rooms append changes to a save journal instead of rewriting the full multisave
+# size limit for decoded seeds, data packages and saves kept between tracker requests, in bytes of the uncompressed
+# data they are decoded from. Seeds are charged for their compressed data and for the sections decoded so far.
+app.config["TRACKER_DATA_CACHE_SIZE"] = 256 * 1024 * 1024
 app.config["DEBUG"] = False
 app.config["PORT"] = 80
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -82,6 +86,8 @@ def register():
     # has automatic patch integration
     import worlds.AutoWorld
     import worlds.Files
+    # patch types register when their world is imported, which the world manifest may have deferred
+    worlds.AutoWorld.AutoWorldRegister.world_types.load_all()
     app.jinja_env.filters['supports_apdeltapatch'] = lambda game_name: \
         game_name in worlds.Files.AutoPatchRegister.patch_types
 
@@ -6,7 +6,6 @@ import datetime
 import functools
 import logging
 import multiprocessing
-import pickle
 import random
 import socket
 import threading
@@ -19,10 +18,11 @@ from pony.orm import commit, db_session, select
 
 import Utils
 
-from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
+from MultiServer import Context, SaveJournal, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, \
+    load_server_cert, get_saving_second, OperationalError
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveJournalFrame, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -86,19 +86,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            time.sleep(5)
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -147,30 +134,128 @@ class WebHostContext(Context):
         return self._load(multidata, game_data_packages, True)
 
     @db_session
-    def init_save(self, enabled: bool = True):
+    def init_save(self, enabled: bool = True, journal: bool = False):
         self.saving = enabled
         if self.saving:
+            if journal:
+                self.save_journal = SaveJournal()
             savegame_data = Room.get(id=self.room_id).multisave
             if savegame_data:
-                self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
-            self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
+                self.set_save(SaveJournal.replay(restricted_loads(savegame_data), self._read_journal()))
+        # polling for commands and auto-saving is done by the process' RoomDispatcher
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
-        room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
+        self._write_save()
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
-            room.last_activity = datetime.datetime.utcnow()
+            Room.get(id=self.room_id).last_activity = datetime.datetime.utcnow()
         return True
 
-    def get_save(self) -> dict:
-        d = super(WebHostContext, self).get_save()
+    def _write_snapshot(self, data: bytes):
+        room = Room.get(id=self.room_id)
+        room.multisave = data
+        room.save_journal.clear()
+
+    def _append_journal(self, data: bytes):
+        SaveJournalFrame(room=Room.get(id=self.room_id), data=data)
+
+    def _read_journal(self) -> bytes:
+        return read_save_journal(Room.get(id=self.room_id))
+
+    def get_save_extras(self) -> dict:
+        d = super(WebHostContext, self).get_save_extras()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
         return d
 
 
+class RoomDispatcher(threading.Thread):
+    """Polls commands for all rooms of a server process with a single query and auto-saves the rooms,
+    instead of running a command thread and a saving thread per room."""
+    command_interval: float = 5  # in seconds
+    _rooms: typing.Dict[int, typing.Tuple[WebHostContext, DBCommandProcessor]]
+    _next_save: typing.Dict[int, float]
+
+    def __init__(self):
+        super().__init__(name="RoomDispatcher", daemon=True)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # held while auto-saving, so remove can wait for it to finish
+        self._rooms = {}
+        self._next_save = {}
+
+    def add(self, ctx: WebHostContext):
+        with self._lock:
+            self._rooms[ctx.room_id] = ctx, DBCommandProcessor(ctx)
+            if ctx.saving:
+                self._next_save[ctx.room_id] = self._get_next_save(ctx)
+
+    def remove(self, ctx: WebHostContext):
+        with self._save_lock, self._lock:
+            if self._rooms.get(ctx.room_id, (None,))[0] is ctx:
+                del self._rooms[ctx.room_id]
+                self._next_save.pop(ctx.room_id, None)
+
+    @staticmethod
+    def _get_next_save(ctx: WebHostContext) -> float:
+        # save at the same second of the interval as MultiServer would, so the tracker can expect it
+        now = datetime.datetime.now()
+        second = get_saving_second(ctx.seed_name, ctx.auto_save_interval)
+        next_wakeup = (second - now.second - now.microsecond * 0.000001) % ctx.auto_save_interval
+        return time.monotonic() + max(1.0, next_wakeup)
+
+    def run(self):
+        next_poll = 0.0
+        while 1:
+            time.sleep(1)
+            with self._lock:
+                rooms = dict(self._rooms)
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.command_interval
+                try:
+                    self.poll_commands(rooms)
+                except Exception as e:
+                    logging.exception(e)
+            self.save_rooms(rooms)
+
+    @db_session
+    def poll_commands(self, rooms: typing.Dict[int, typing.Tuple[WebHostContext, DBCommandProcessor]]):
+        if not rooms:
+            return
+        room_ids = list(rooms)
+        commands = select(command for command in Command if command.room.id in room_ids)
+        if commands:
+            for command in commands:
+                ctx, cmdprocessor = rooms[command.room.id]
+                if not ctx.exit_event.is_set():
+                    ctx.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
+                command.delete()
+            commit()
+
+    def save_rooms(self, rooms: typing.Dict[int, typing.Tuple[WebHostContext, DBCommandProcessor]]):
+        now = time.monotonic()
+        for room_id, (ctx, _) in rooms.items():
+            with self._save_lock:
+                next_save = self._next_save.get(room_id)  # None once removed
+                if next_save is None or now < next_save:
+                    continue
+                try:
+                    if ctx.save_dirty:
+                        ctx.logger.debug("Saving via dispatcher.")
+                        ctx._save()
+                except OperationalError as e:
+                    ctx.logger.exception(e)
+                    ctx.logger.info(f"Saving failed. Retry in {ctx.auto_save_interval} seconds.")
+                else:
+                    ctx.save_dirty = False
+                with self._lock:
+                    self._next_save[room_id] = self._get_next_save(ctx)
+
+
+def read_save_journal(room: Room) -> bytes:
+    """All save journal frames of a room, in the order they were written."""
+    return b"".join(frame.data for frame in room.save_journal.order_by(SaveJournalFrame.id))
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
@@ -226,7 +311,8 @@ def set_up_logging(room_id) -> logging.Logger:
 
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       save_journal: bool = False):
     Utils.init_logging(name)
     try:
         import resource
@@ -252,6 +338,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    dispatcher = RoomDispatcher()
+    dispatcher.start()
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -259,7 +347,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 logger = set_up_logging(room_id)
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
-                ctx.init_save()
+                ctx.init_save(journal=save_journal)
+                dispatcher.add(ctx)
                 assert ctx.server is None
                 try:
                     ctx.server = websockets.serve(
@@ -296,6 +385,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 await ctx.shutdown_task
 
             except (KeyboardInterrupt, SystemExit):
+                dispatcher.remove(ctx)
                 if ctx.saving:
                     ctx._save()
                     setattr(asyncio.current_task(), "save", None)
@@ -306,14 +396,15 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 logger.exception(e)
                 raise
             else:
+                dispatcher.remove(ctx)
                 if ctx.saving:
                     ctx._save()
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
-                    ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
-                    ctx.exit_event.set()  # make sure the saving thread stops at some point
-                    # NOTE: async saving should probably be an async task and could be merged with shutdown_task
+                    dispatcher.remove(ctx)  # no-op unless hosting failed
+                    ctx.save_dirty = False
+                    ctx.exit_event.set()
                     with (db_session):
                         # ensure the Room does not spin up again on its own, minute of safety buffer
                         room = Room.get(id=room_id)
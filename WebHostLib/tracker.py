@@ -1,23 +1,26 @@
 import datetime
 import collections
+import threading
+import zlib
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Hashable, List, MutableMapping, Optional, Set, Tuple, NamedTuple, Counter, \
+    Union
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import make_response, render_template, request, Request, Response
 from werkzeug.exceptions import abort
 
-from MultiServer import Context, get_saving_second
-from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
+from MultiServer import Context, SaveJournal, get_saving_second
+from NetUtils import ClientStatus, Hint, MultiData, NetworkItem, NetworkSlot, SlotType, multidata_format_version
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
+from .customserver import read_save_journal
 from .models import GameDataPackage, Room
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
 
-_multidata_cache = {}
 _multiworld_trackers: Dict[str, Callable] = {}
 _player_trackers: Dict[str, Callable] = {}
 
@@ -25,6 +28,91 @@ TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
 
+class _TrackerDataCache:
+    """Process-wide LRU cache of decoded data shared by TrackerData instances.
+
+    Entries are replaced when their version changes and the least recently used ones are evicted once their summed size
+    exceeds the limit. Sizes are the uncompressed size of the stored data an entry was decoded from. Multidata decodes
+    its sections while cached, so sizes can be functions, which are measured again each time the cache is used.
+    """
+    size: int
+    # key: (version, value, size function, charged size)
+    _entries: "collections.OrderedDict[Hashable, Tuple[Hashable, Any, Callable[[], int], int]]"
+
+    def __init__(self):
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, load: Callable[[], Tuple[Any, Union[int, Callable[[], int]]]],
+            max_size: int) -> Any:
+        """Returns the cached value for key if its version matches, otherwise calls load for (value, size)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._update_sizes(max_size)
+                return entry[1]
+
+        value, size = load()  # outside the lock, loading the same key twice concurrently is harmless
+        size_function = size if callable(size) else lambda: size
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry:
+                self.size -= old_entry[3]
+            self._entries[key] = version, value, size_function, 0
+            self._update_sizes(max_size)
+        return value
+
+    def _update_sizes(self, max_size: int) -> None:
+        for key, (version, value, size_function, charged_size) in list(self._entries.items()):
+            size = size_function()
+            if size != charged_size:
+                self._entries[key] = version, value, size_function, size
+                self.size += size - charged_size
+        while self.size > max_size:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_tracker_data_cache = _TrackerDataCache()
+
+
+def _load_multidata(room: Room) -> Tuple[MutableMapping[str, Any], Union[int, Callable[[], int]]]:
+    data = room.seed.multidata
+    if data[0] < multidata_format_version:
+        decompressed = zlib.decompress(data[1:])
+        return restricted_loads(decompressed), len(decompressed)
+    multidata = Context.decompress(data)
+    assert isinstance(multidata, MultiData)
+    # sections are decoded as trackers use them
+    return multidata, lambda: len(data) + multidata.decoded_size
+
+
+def _load_multisave(room: Room) -> Tuple[Dict[str, Any], int]:
+    if not room.multisave:
+        return {}, 0
+    journal = read_save_journal(room)
+    return SaveJournal.replay(restricted_loads(room.multisave), journal), len(room.multisave) + len(journal)
+
+
+def _load_game_package_names(checksum: str) -> Tuple[Tuple[Dict[str, int], Dict[str, int],
+                                                          Dict[int, str], Dict[int, str]], int]:
+    data = GameDataPackage.get(checksum=checksum).data
+    game_package = restricted_loads(data)
+    item_id_to_name = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
+        id: name for name, id in game_package["item_name_to_id"].items()})
+    location_id_to_name = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
+        id: name for name, id in game_package["location_name_to_id"].items()})
+    return (game_package["item_name_to_id"], game_package["location_name_to_id"],
+            item_id_to_name, location_id_to_name), len(data)
+
+
 def _cache_results(func: Callable) -> Callable:
     """Stores the results of any computationally expensive methods after the initial call in TrackerData.
     If called again, returns the cached result instead, as results will not change for the lifetime of TrackerData.
@@ -47,17 +135,25 @@ class TrackerData:
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    Decoded multidata, data packages and multisave are shared between instances until the room is saved again,
+    so they must not be modified.
     """
     room: Room
     _multidata: Dict[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
+    _max_cache_size: int
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        max_cache_size: int = app.config["TRACKER_DATA_CACHE_SIZE"]
+        self._max_cache_size = max_cache_size
+        # a seed never changes and a room's last_activity is updated with each save
+        self._multidata = _tracker_data_cache.get(("multidata", room.seed.id), None,
+                                                  lambda: _load_multidata(room), max_cache_size)
+        self._multisave = _tracker_data_cache.get(("multisave", room.id), room.last_activity,
+                                                  lambda: _load_multisave(room), max_cache_size)
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -71,15 +167,10 @@ class TrackerData:
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
         for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+            checksum = game_package["checksum"]
+            self.item_name_to_id[game], self.location_name_to_id[game], \
+                self.item_id_to_name[game], self.location_id_to_name[game] = _tracker_data_cache.get(
+                    ("datapackage", checksum), None, lambda: _load_game_package_names(checksum), max_cache_size)
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -297,6 +388,29 @@ class TrackerData:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    def get_sphere_index(self) -> Dict[int, Dict[int, int]]:
+        """ { player: { location_id: sphere, ... } }, shared between instances like the multidata it is built from """
+        spheres = self.get_spheres()
+        # charged as an int64 location id and sphere per location
+        return _tracker_data_cache.get(
+            ("sphere_index", self.room.seed.id), None,
+            lambda: (Context.build_sphere_index(spheres),
+                     16 * sum(len(locations) for sphere in spheres for locations in sphere.values())),
+            self._max_cache_size)
+
+    @_cache_results
+    def get_team_sphere_checks(self, team: int) -> List[Tuple[int, int, int]]:
+        """Retrieves (sphere, player, location_id) of each checked location of a team, ordered by sphere and player.
+        Spheres count from 0 and checked locations in no sphere are left out."""
+        checks = []
+        for player, player_spheres in self.get_sphere_index().items():
+            for location_id in self.get_player_checked_locations(team, player):
+                sphere = player_spheres.get(location_id)
+                if sphere is not None:
+                    checks.append((sphere, player, location_id))
+        checks.sort()
+        return checks
+
 
 def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -> Optional[Response]:
     if not room:
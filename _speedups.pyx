@@ -14,6 +14,7 @@ from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
 from libc.stdint cimport int64_t, uint32_t
+from libc.stdlib cimport qsort
 from collections import defaultdict
 
 cdef extern from *:
@@ -69,6 +70,25 @@ cdef struct IndexEntry:
     size_t count
 
 
+cdef struct ReceiverKey:
+    # temporary sort key used to build the receiver index
+    ap_player_t receiver
+    ap_id_t item
+    size_t entry
+
+
+cdef int compare_receiver_keys(const void* a, const void* b) noexcept nogil:
+    cdef const ReceiverKey* x = <const ReceiverKey*>a
+    cdef const ReceiverKey* y = <const ReceiverKey*>b
+    if x.receiver != y.receiver:
+        return -1 if x.receiver < y.receiver else 1
+    if x.item != y.item:
+        return -1 if x.item < y.item else 1
+    if x.entry != y.entry:
+        return -1 if x.entry < y.entry else 1
+    return 0
+
+
 if TYPE_CHECKING:
     State = Dict[Tuple[int, int], Set[int]]
 else:
@@ -96,6 +116,10 @@ cdef class LocationStore:
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
     cdef PyObject** _raw_proxies  # 8K/1000 players, faster access to _proxies, but does not keep a ref
+    # optional reverse index: entry indices sorted by receiver, item and entry, with ranges per receiver
+    cdef size_t* receiver_order  # 800KB/100k items
+    cdef IndexEntry* receiver_index  # 16KB/1000 players
+    cdef size_t receiver_index_size
 
     def get_size(self):
         from sys import getsizeof
@@ -106,17 +130,19 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        if self.receiver_index:
+            size += sizeof(size_t) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         return size
 
-    def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
+    def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]], indexed: bool = True) -> None:
         self._mem = Pool()
-        cdef object key
         self._keys = []
         self._items = []
         self._proxies = []
 
         # iterate over everything to get all maxima and validate everything
         cdef size_t max_sender = INVALID_SIZE  # keep track of highest used player id for indexing
+        cdef size_t max_receiver = 0
         cdef size_t sender_count = 0
         cdef size_t count = 0
         for sender, locations in locations_dict.items():
@@ -131,6 +157,7 @@ cdef class LocationStore:
                 receiver = data[1]
                 if receiver < 1 or receiver > MAX_PLAYER_ID:
                     raise ValueError(f"Invalid player id {receiver} for item")
+                max_receiver = max(max_receiver, receiver)
                 count += 1
             sender_count += 1
 
@@ -172,7 +199,69 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        self._finish(max_sender, count, max_receiver, indexed)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[int], players: int, indexed: bool = True) -> LocationStore:
+        """Builds the store from a flat int64 buffer of (sender, location, item, receiver, flags) rows,
+        sorted by sender and location, as stored in multidata. players is the amount of senders."""
+        cdef LocationStore store = cls.__new__(cls)
+        store._init_rows(rows, players, indexed)
+        return store
+
+    cdef void _init_rows(self, const int64_t[:] rows, size_t players, bint indexed) except *:
+        self._mem = Pool()
+        self._keys = []
+        self._items = []
+        self._proxies = []
+
+        if not players:
+            raise ValueError(f"Rejecting game with 0 players")
+        if players > MAX_PLAYER_ID:
+            raise ValueError(f"Invalid player id {players} for location")
+        if rows.shape[0] % 5:
+            raise ValueError("Location rows have to be (sender, location, item, receiver, flags)")
+        cdef size_t count = rows.shape[0] // 5
+        if not count:
+            warnings.warn("Game has no locations")
+        else:
+            self.entries = <LocationEntry*>self._mem.alloc(count, sizeof(LocationEntry))
+        self.sender_index = <IndexEntry*>self._mem.alloc(players + 1, sizeof(IndexEntry))
+        self._raw_proxies = <PyObject**>self._mem.alloc(players + 1, sizeof(PyObject*))
+
+        cdef size_t i
+        cdef size_t max_receiver = 0
+        cdef int64_t sender, location, receiver
+        cdef int64_t last_sender = 0
+        cdef int64_t last_location = 0
+        for i in range(count):
+            sender = rows[i * 5]
+            location = rows[i * 5 + 1]
+            receiver = rows[i * 5 + 3]
+            if sender < 1 or <size_t>sender > players:
+                raise ValueError(f"Invalid player id {sender} for location")
+            if receiver < 1 or receiver > MAX_PLAYER_ID:
+                raise ValueError(f"Invalid player id {receiver} for item")
+            if sender < last_sender or (sender == last_sender and location <= last_location):
+                raise ValueError("Location rows are not sorted")
+            if sender != last_sender:
+                self.sender_index[sender].start = i
+            self.sender_index[sender].count += 1
+            self.entries[i].sender = <ap_player_t>sender
+            self.entries[i].location = location
+            self.entries[i].item = rows[i * 5 + 2]
+            self.entries[i].receiver = <ap_player_t>receiver
+            self.entries[i].flags = <ap_flags_t>rows[i * 5 + 4]
+            max_receiver = max(max_receiver, <size_t>receiver)
+            last_sender = sender
+            last_location = location
+
+        self._finish(players, count, max_receiver, indexed)
+
+    cdef void _finish(self, size_t max_sender, size_t count, size_t max_receiver, bint indexed) except *:
         # build pyobject caches
+        cdef size_t i
+        cdef object key
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
         for i in range(1, max_sender + 1):
@@ -188,7 +277,42 @@ cdef class LocationStore:
 
         self.sender_index_size = max_sender + 1
         self.entry_count = count
-        self._len = sender_count
+        self._len = max_sender
+
+        if indexed:
+            self._build_receiver_index(max_receiver)
+
+    cdef void _build_receiver_index(self, size_t max_receiver) except *:
+        cdef size_t i
+        cdef ReceiverKey* keys
+        self.receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
+        self.receiver_index_size = max_receiver + 1
+        if not self.entry_count:
+            return
+        self.receiver_order = <size_t*>self._mem.alloc(self.entry_count, sizeof(size_t))
+        keys = <ReceiverKey*>self._mem.alloc(self.entry_count, sizeof(ReceiverKey))
+        try:
+            with nogil:
+                for i in range(self.entry_count):
+                    keys[i].receiver = self.entries[i].receiver
+                    keys[i].item = self.entries[i].item
+                    keys[i].entry = i
+                qsort(keys, self.entry_count, sizeof(ReceiverKey), compare_receiver_keys)
+                for i in range(self.entry_count):
+                    self.receiver_order[i] = keys[i].entry
+                    if self.receiver_index[keys[i].receiver].count == 0:
+                        self.receiver_index[keys[i].receiver].start = i
+                    self.receiver_index[keys[i].receiver].count += 1
+        finally:
+            self._mem.free(keys)
+
+    cdef bint _receiver_range(self, object slot, size_t* start, size_t* count) except -1:
+        # returns the range in receiver_order for slot, or False if slot never receives anything
+        if not isinstance(slot, int) or slot < 0 or slot >= self.receiver_index_size:
+            return False
+        start[0] = self.receiver_index[<size_t>slot].start
+        count[0] = self.receiver_index[<size_t>slot].count
+        return count[0] != 0
 
     # fake dict access
     def __len__(self) -> int:
@@ -220,7 +344,32 @@ cdef class LocationStore:
         cdef ap_player_t receiver
         cdef ap_player_set* receivers
         cdef size_t slot_count = len(slots)
-        if slot_count == 1:
+        cdef size_t start, count, low, high, mid
+        cdef LocationEntry* hit
+        cdef list found
+        if self.receiver_index:
+            # binary search for item in each receiver's range of the reverse index
+            found = []
+            for slot in slots:
+                if not self._receiver_range(slot, &start, &count):
+                    continue
+                low = start
+                high = start + count
+                while low < high:
+                    mid = (low + high) // 2
+                    if self.entries[self.receiver_order[mid]].item < item:
+                        low = mid + 1
+                    else:
+                        high = mid
+                while low < start + count and self.entries[self.receiver_order[low]].item == item:
+                    found.append(self.receiver_order[low])
+                    low += 1
+            if slot_count > 1:
+                found.sort()  # same order as a full scan
+            for i in found:
+                hit = self.entries + <size_t>i
+                yield hit.sender, hit.location, hit.item, hit.receiver, hit.flags
+        elif slot_count == 1:
             # specialized implementation for single slot
             receiver = list(slots)[0]
             with nogil:
@@ -247,7 +396,17 @@ cdef class LocationStore:
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
         cdef ap_player_t receiver = slot
+        cdef size_t start, count, i
+        cdef LocationEntry* hit
         all_locations: Dict[int, Set[int]] = {}
+        if self.receiver_index:
+            if self._receiver_range(slot, &start, &count):
+                for i in range(start, start + count):
+                    hit = self.entries + self.receiver_order[i]
+                    all_locations.setdefault(hit.sender, set()).add(hit.location)
+                # same order as a full scan
+                return {sender: all_locations[sender] for sender in sorted(all_locations)}
+            return all_locations
         with nogil:
             for entry in self.entries[:self.entry_count]:
                 if entry.receiver == receiver:
@@ -23,24 +23,22 @@ __all__ = [
 
 no_gui = False
 skip_autosave = False
-_world_settings_name_cache: Dict[str, str] = {}  # TODO: cache on disk and update when worlds change
+_world_settings_name_cache: Dict[str, str] = {}  # settings key -> game, from the world manifest
 _world_settings_name_cache_updated = False
 _lock = Lock()
 
 
 def _update_cache() -> None:
-    """Load all worlds and update world_settings_name_cache"""
+    """Update world_settings_name_cache from the world manifest, without importing the worlds"""
     global _world_settings_name_cache_updated
     if _world_settings_name_cache_updated:
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        from worlds import manifest
+        for game, entry in manifest.items():
+            if entry["settings_key"] is not None:
+                _world_settings_name_cache[entry["settings_key"]] = game
     finally:
         _world_settings_name_cache_updated = True
 
@@ -534,6 +532,12 @@ class ServerOptions(Group):
     class DisableItemCheat(Bool):
         """Disallow !getitem"""
 
+    class SaveJournal(Bool):
+        """
+        Append changes to a journal next to the save file, instead of rewriting the whole save each time.
+        The journal gets folded back into the save file once it grows bigger than it.
+        """
+
     class LocationCheckPoints(int):
         """
         Client hint system
@@ -603,6 +607,7 @@ class ServerOptions(Group):
     multidata: Optional[str] = None
     savefile: Optional[str] = None
     disable_save: bool = False
+    save_journal: Union[SaveJournal, bool] = False
     loglevel: str = "info"
     logtime: bool = False
     server_password: Optional[ServerPassword] = None
@@ -674,6 +679,24 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class ZipCompressionLevel(int):
+        """
+        Compression level of the zip with all output files, from 0 (fastest) to 9 (smallest).
+        Files that are compressed already, like most patches, are stored as they are.
+        """
+
+    class ParallelStages(int):
+        """
+        Amount of threads to run the early generation steps of worlds that allow it on, 0 to run them one by one.
+        The result is the same either way. This only speeds up worlds whose steps wait on files or the network.
+        """
+
+    class BitsetState(Bool):
+        """
+        Track the progress of fill and balancing in compact, copy-on-write bitsets instead of sets and counters.
+        Faster for multiworlds with many players, the result is the same either way.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -683,6 +706,9 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    parallel_stages: ParallelStages = ParallelStages(0)
+    bitset_state: Union[BitsetState, bool] = False
+    zip_compression_level: ZipCompressionLevel = ZipCompressionLevel(9)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -734,6 +760,7 @@ class Settings(Group):
     bizhawkclient_options: BizHawkClientOptions = BizHawkClientOptions()
 
     _filename: Optional[str] = None
+    _autosaving: bool = False
 
     def __getattribute__(self, key: str) -> Any:
         if key.startswith("_") or key in self.__class__.__dict__:
@@ -751,9 +778,18 @@ class Settings(Group):
             if key not in _world_settings_name_cache:
                 # not a world group
                 return super().__getattribute__(key)
-            # directly import world and grab settings class
-            world_mod, world_cls_name = _world_settings_name_cache[key].rsplit(".", 1)
-            world = cast(type, getattr(__import__(world_mod, fromlist=[world_cls_name]), world_cls_name))
+            # import only this world and grab settings class
+            from worlds.AutoWorld import AutoWorldRegister
+            game = _world_settings_name_cache[key]
+            if self._autosaving and AutoWorldRegister.world_types.is_pending(game):
+                # importing worlds during interpreter shutdown can fail or hang, keep loaded data
+                return super().__getattribute__(key)
+            try:
+                world = AutoWorldRegister.world_types[game]
+            except KeyError:
+                # world failed to import, keep loaded data
+                return super().__getattribute__(key)
+            world_mod, world_cls_name = world.__module__, world.__name__
             assert getattr(world, "settings_key") == key
             try:
                 cls_or_name = world.__annotations__["settings"]
@@ -815,6 +851,7 @@ class Settings(Group):
                 assert "pytest" not in main_file and "unittest" not in main_file, \
                        f"Auto-saving {self._filename} during unittests"
             if self._filename and self.changed and not skip_autosave:
+                self._autosaving = True
                 self.save()
 
         if not skip_autosave:
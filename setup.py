@@ -54,10 +54,13 @@ if __name__ == "__main__":
     import ModuleUpdate
     ModuleUpdate.update(yes="--yes" in sys.argv or "-y" in sys.argv)
 
+from worlds.AutoWorld import AutoWorldRegister
 from worlds.LauncherComponents import components, icon_paths
 from Utils import version_tuple, is_windows, is_linux
 from Cython.Build import cythonize
 
+AutoWorldRegister.world_types.load_all()  # world components are only added when the worlds are imported
+
 
 # On  Python < 3.10 LogicMixin is not currently supported.
 non_apworlds: Set[str] = {
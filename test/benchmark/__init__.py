@@ -5,3 +5,8 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    locations.run_deaths_door_rules_benchmark()
+    import collection_state
+    collection_state.run_collection_state_benchmark()
+    import network_encoding
+    network_encoding.run_network_encoding_benchmark()
@@ -0,0 +1,98 @@
+def run_collection_state_benchmark():
+    import argparse
+    import gc
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState, BitsetCollectionState, Location
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early",
+            "create_regions",
+            "create_items",
+            "set_rules",
+            "connect_entrances",
+            "generate_basic",
+            "pre_fill",
+        )
+
+        games: typing.Tuple[str, ...] = ("Hollow Knight", "Timespinner", "Rogue Legacy")
+        players: int = 100
+        copy_iterations: int = 1000
+        sweep_iterations: int = 5
+
+        def create_multiworld(self) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            multiworld.game = {player: self.games[(player - 1) % len(self.games)]
+                               for player in multiworld.player_ids}
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            multiworld.state = CollectionState(multiworld)
+            args = argparse.Namespace()
+            for player, game in multiworld.game.items():
+                for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+                    options = getattr(args, name, {})
+                    options[player] = option.from_any(option.default)
+                    setattr(args, name, options)
+            multiworld.set_options(args)
+            for step in self.gen_steps:
+                with TimeIt(f"{self.players} players step {step}", logger):
+                    call_all(multiworld, step)
+            return multiworld
+
+        @staticmethod
+        def create_state(state_type: typing.Type[CollectionState], multiworld: MultiWorld) -> CollectionState:
+            """State holding the whole progression item pool, not swept yet."""
+            state = state_type(multiworld)
+            for item in multiworld.itempool:
+                if item.advancement:
+                    state.collect(item, True)
+            return state
+
+        def state_test(self, state_type: typing.Type[CollectionState],
+                       multiworld: MultiWorld) -> typing.Tuple[float, float, typing.Set[Location]]:
+            name = state_type.__name__
+            base_state = self.create_state(state_type, multiworld)
+            gc.collect()
+            with TimeIt(f"{self.sweep_iterations} sweeps of {name}", logger) as sweep_time:
+                for _ in range(self.sweep_iterations):
+                    state = base_state.copy()
+                    state.sweep_for_advancements()
+                gc.collect()
+
+            with TimeIt(f"{self.copy_iterations} copies of a swept {name}", logger) as copy_time:
+                for _ in range(self.copy_iterations):
+                    state.copy()
+                gc.collect()
+
+            reachable = {location for location in multiworld.get_locations() if location.can_reach(state)}
+            return sweep_time.dif, copy_time.dif, reachable
+
+        def main(self):
+            multiworld = self.create_multiworld()
+            sweep, copy, reachable = self.state_test(CollectionState, multiworld)
+            bitset_sweep, bitset_copy, bitset_reachable = self.state_test(BitsetCollectionState, multiworld)
+            if reachable != bitset_reachable:
+                logger.error(f"BitsetCollectionState disagrees with CollectionState on "
+                             f"{len(reachable ^ bitset_reachable)} locations.")
+            logger.info(f"{self.players} players, BitsetCollectionState against CollectionState:\n"
+                        f"  sweep: {sweep / bitset_sweep:.2f}x\n"
+                        f"  copy: {copy / bitset_copy:.2f}x")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_collection_state_benchmark()
@@ -103,7 +103,66 @@ def run_locations_benchmark():
     runner.main()
 
 
+def run_deaths_door_rules_benchmark():
+    """Compare the Death's Door logic tree interpreter against the compiled rules on every location."""
+    import argparse
+    import logging
+    import gc
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    game = "Death's Door"
+    rule_iterations = 100
+    if game not in AutoWorld.AutoWorldRegister.world_types:
+        logger.warning(f"{game} is not loaded, skipping the rule compiler benchmark.")
+        return
+
+    multiworld = MultiWorld(1)
+    multiworld.game[1] = game
+    multiworld.player_name = {1: "Tester"}
+    multiworld.set_seed(0)
+    multiworld.state = CollectionState(multiworld)
+    args = argparse.Namespace()
+    for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+        setattr(args, name, {1: option.from_any(getattr(option, "default"))})
+    multiworld.set_options(args)
+    for step in ("generate_early", "create_regions", "create_items", "set_rules"):
+        call_all(multiworld, step)
+
+    rules = [location.data.rule for location in multiworld.get_locations(1)]
+    all_state = multiworld.get_all_state(False)
+    for state_name, state in (("empty_state", multiworld.state), ("all_state", all_state)):
+        for rule in rules:
+            if rule.interpret(1, state) != rule.evaluate(1, state):
+                logger.error(f"Compiled rule disagrees with the interpreter in {state_name}: {rule.logic}")
+
+        gc.collect()
+        with TimeIt(f"{game} {rule_iterations} runs of {len(rules)} interpreted rules({state_name})", logger) as t:
+            for _ in range(rule_iterations):
+                for rule in rules:
+                    rule.interpret(1, state)
+        interpreted = t.dif
+
+        gc.collect()
+        with TimeIt(f"{game} {rule_iterations} runs of {len(rules)} compiled rules({state_name})", logger) as t:
+            for _ in range(rule_iterations):
+                for rule in rules:
+                    rule.evaluate(1, state)
+        compiled = t.dif
+
+        logger.info(f"{game} compiled rules are {interpreted / compiled:.2f}x faster in {state_name}.")
+
+
 if __name__ == "__main__":
     from path_change import change_home
     change_home()
     run_locations_benchmark()
+    run_deaths_door_rules_benchmark()
@@ -0,0 +1,68 @@
+def run_network_encoding_benchmark():
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from NetUtils import NetworkItem, NetworkPlayer, _decode, _encode, _scan_for_TypedTuples, decode, encode
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        iterations: int = 1000
+        items: int = 5000
+
+        def messages(self) -> typing.Dict[str, typing.List[dict]]:
+            items = [NetworkItem(item, item + 100_000, item % 100, item % 8) for item in range(self.items)]
+            return {
+                f"ReceivedItems with {self.items} items": [{"cmd": "ReceivedItems", "index": 0, "items": items}],
+                "Connected": [{"cmd": "Connected", "team": 0, "slot": 1,
+                               "players": [NetworkPlayer(0, slot, f"Alias{slot}", f"Player{slot}")
+                                           for slot in range(1, 100)],
+                               "missing_locations": list(range(self.items)), "checked_locations": [],
+                               "slot_data": {"options": {f"option{n}": n for n in range(100)}},
+                               "hint_points": 0}],
+                "PrintJSON ItemSend": [{"cmd": "PrintJSON", "data": [{"text": "sent"}, {"type": "item_id",
+                                                                                         "text": "1", "flags": 1}],
+                                        "type": "ItemSend", "receiving": 1, "item": items[1]}] * 100,
+            }
+
+        def incoming(self) -> typing.Dict[str, str]:
+            return {
+                "LocationChecks": encode([{"cmd": "LocationChecks", "locations": list(range(self.items))}]),
+                "Set": encode([{"cmd": "Set", "key": "key", "operations": [
+                    {"operation": "replace", "value": {f"key{n}": {"value": [n, {"n": n}]}
+                                                       for n in range(self.items)}}]}]),
+            }
+
+        def main(self):
+            for name, msgs in self.messages().items():
+                assert encode(msgs) == _encode(_scan_for_TypedTuples(msgs))
+                with TimeIt(f"{self.iterations} scanning encodes of {name}", logger) as scanning:
+                    for _ in range(self.iterations):
+                        _encode(_scan_for_TypedTuples(msgs))
+                with TimeIt(f"{self.iterations} encodes of {name}", logger) as fast:
+                    for _ in range(self.iterations):
+                        encode(msgs)
+                logger.info(f"encode {name}: {scanning.dif / fast.dif:.2f}x")
+
+            for name, text in self.incoming().items():
+                assert decode(text) == _decode(text)
+                with TimeIt(f"{self.iterations} hooked decodes of {name}", logger) as hooked:
+                    for _ in range(self.iterations):
+                        _decode(text)
+                with TimeIt(f"{self.iterations} decodes of {name}", logger) as fast:
+                    for _ in range(self.iterations):
+                        decode(text)
+                logger.info(f"decode {name}: {hooked.dif / fast.dif:.2f}x")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_network_encoding_benchmark()
@@ -3,8 +3,8 @@ import unittest
 
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
-from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
+from Fill import FillError, IncrementalSweep, LocationIndex, balance_multiworld_progression, fill_restrictive, \
+    distribute_early_items, distribute_items_restrictive, sweep_from_pool
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
@@ -464,6 +464,88 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
 
+    def test_incremental_sweep(self):
+        """Test that the incremental sweep matches sweep_from_pool after placements, even into its checkpoint"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 4, 4)
+        items = player1.prog_items
+        locations = player1.locations
+        for i in range(1, 4):
+            set_rule(locations[i], lambda state, i=i: state.has(items[i - 1].name, player1.id))
+
+        def reachable(state) -> List[Location]:
+            return [location for location in locations if location.can_reach(state)]
+
+        sweeper = IncrementalSweep(multiworld.state)
+        pool = items.copy()
+        self.assertEqual(reachable(sweeper.sweep(pool, placed_last=pool[:2])), locations)
+        self.assertIsNotNone(sweeper.checkpoint)
+
+        # placing items from outside the checkpoint keeps it
+        checkpoint = sweeper.checkpoint
+        multiworld.push_item(locations[0], pool.pop(3), False)
+        self.assertEqual(reachable(sweeper.sweep(pool)), reachable(sweep_from_pool(multiworld.state, pool)))
+        self.assertIs(sweeper.checkpoint, checkpoint)
+
+        # retracting an item of the checkpoint builds a new one
+        multiworld.push_item(locations[3], pool.pop(0), False)
+        self.assertEqual(reachable(sweeper.sweep(pool, placed_last=pool[:1])),
+                         reachable(sweep_from_pool(multiworld.state, pool)))
+        self.assertIsNot(sweeper.checkpoint, checkpoint)
+
+    def test_incremental_sweep_single_player(self):
+        """Test that the incremental sweep matches sweep_from_pool when each batch sweeps another player's locations"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 3, 3)
+        player2 = generate_player_data(multiworld, 2, 3, 2)
+        set_rule(player1.locations[1], lambda state: state.has(player1.prog_items[2].name, player1.id))
+        multiworld.push_item(player1.locations[0], player1.prog_items[0], False)
+        multiworld.push_item(player1.locations[1], player1.prog_items[1], False)
+
+        def assert_sweep_matches(pool: List[Item], player: int) -> None:
+            filled_locations = multiworld.get_filled_locations(player)
+            state = sweeper.sweep(pool, filled_locations, pool[:1])
+            expected = sweep_from_pool(multiworld.state, pool, filled_locations)
+            self.assertEqual(state.prog_items, expected.prog_items)
+            self.assertEqual(state.advancements, expected.advancements)
+
+        sweeper = IncrementalSweep(multiworld.state)
+        pool = [player1.prog_items[2], *player2.prog_items]
+        assert_sweep_matches(pool, 1)
+        checkpoint = sweeper.checkpoint
+        self.assertTrue(checkpoint.has(player1.prog_items[1].name, player1.id))
+
+        # player 1's locations are not swept for player 2's batch
+        assert_sweep_matches(pool, 2)
+        self.assertIsNot(sweeper.checkpoint, checkpoint)
+
+        # a checkpoint swept from fewer locations is kept
+        multiworld.push_item(player2.locations[0], pool.pop(), False)
+        checkpoint = sweeper.checkpoint
+        assert_sweep_matches(pool, 2)
+        self.assertIs(sweeper.checkpoint, checkpoint)
+
+    def test_location_index(self):
+        """Test that the location index finds the same spot as a scan of the locations"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 3, 1, 1)
+        player2 = generate_player_data(multiworld, 2, 3, 1, 1)
+        locations = [player2.locations[0], player1.locations[0], player1.locations[1],
+                     player2.locations[1], player1.locations[2], player2.locations[2]]
+        player1.locations[0].progress_type = LocationProgressType.EXCLUDED
+        set_rule(player2.locations[0], lambda state: False)
+        player1.locations[1].always_allow = lambda state, item: item.player == 2
+
+        index = LocationIndex(locations)
+        state = multiworld.state
+        self.assertIs(index.find(state, player1.prog_items[0]), player1.locations[1])
+        self.assertIs(index.find(state, player2.prog_items[0], player=2), player2.locations[1])
+        self.assertIs(index.find(state, player1.basic_items[0]), player1.locations[0])
+        self.assertIs(index.find(state, player2.basic_items[0], False), player2.locations[0])
+        self.assertEqual(locations, [player1.locations[2], player2.locations[2]])
+        self.assertIsNone(index.find(state, player1.prog_items[0], player=3))
+
+
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
         """Test that distribute_items_restrictive is deterministic"""
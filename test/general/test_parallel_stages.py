@@ -0,0 +1,46 @@
+import concurrent.futures
+import sys
+import unittest
+from unittest import mock
+
+from BaseClasses import MultiWorld
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import gen_steps, setup_multiworld
+
+
+def describe(multiworld: MultiWorld) -> list:
+    """Everything the generation steps produced, in the order it was produced in."""
+    return [
+        [(region.name, [(location.name, location.address, location.item and location.item.name)
+                        for location in region.locations], [exit_.name for exit_ in region.exits])
+         for region in multiworld.regions],
+        [(item.name, item.player) for item in multiworld.itempool],
+        [world.random.getstate() for world in multiworld.worlds.values()],
+        multiworld.random.getstate(),
+    ]
+
+
+class TestParallelStages(unittest.TestCase):
+    def test_same_result(self) -> None:
+        """Worlds that declare their stages parallel safe generate the same with and without a pool."""
+        for game, world_type in AutoWorldRegister.world_types.items():
+            if not world_type.parallel_stage_safe:
+                continue
+            with self.subTest(game=game):
+                serial = setup_multiworld([world_type] * 3, seed=42)
+                parallel = setup_multiworld([world_type] * 3, steps=(), seed=42)
+                with concurrent.futures.ThreadPoolExecutor(3) as pool:
+                    for step in gen_steps:
+                        call_all(parallel, step, pool=pool)
+                self.assertTrue(parallel.random.passthrough)
+                self.assertEqual(describe(serial), describe(parallel))
+
+    def test_serial_without_gil(self) -> None:
+        """Without a GIL, the pool is not used, as parallel stages rely on it."""
+        world_type = next(world_type for world_type in AutoWorldRegister.world_types.values()
+                          if world_type.parallel_stage_safe)
+        multiworld = setup_multiworld([world_type] * 2, steps=())
+        pool = mock.Mock(spec=concurrent.futures.Executor)
+        pool.submit.side_effect = AssertionError("stage submitted to the pool")
+        with mock.patch.object(sys, "_is_gil_enabled", lambda: False, create=True):
+            call_all(multiworld, "generate_early", pool=pool)
@@ -1,7 +1,11 @@
 import unittest
+from collections import Counter
 
+from BaseClasses import BitsetCollectionState, CollectionState, ItemCounts, SphereSearch, StateIndex
+from Fill import balance_multiworld_progression, distribute_items_restrictive
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import gen_steps, generate_items, generate_locations, generate_test_multiworld, setup_multiworld, \
+    setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +31,156 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, True))
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep_with_location_dependencies(self):
+        """Ensure a sweep using a location dependency index collects chained advancements and doesn't recheck
+        locations whose dependencies didn't change."""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        locations = generate_locations(3, 1, menu)
+        items = generate_items(3, 1, True)
+        for location, item in zip(locations, items):
+            location.place_locked_item(item)
+
+        checks = Counter()
+
+        def rule(index: int, requirement: str):
+            def access_rule(state: CollectionState) -> bool:
+                checks[index] += 1
+                return not requirement or state.has(requirement, 1)
+            return access_rule
+
+        locations[0].access_rule = rule(0, "")
+        locations[1].access_rule = rule(1, items[0].name)
+        locations[2].access_rule = rule(2, "Missing Item")
+        multiworld.worlds[1].get_location_dependencies = lambda: {
+            items[0].name: {locations[1]},
+            "Missing Item": {locations[2]},
+        }
+
+        state = CollectionState(multiworld)
+        state.sweep_for_advancements(locations)
+        self.assertTrue(state.has_all([items[0].name, items[1].name], 1))
+        self.assertFalse(state.has(items[2].name, 1))
+        self.assertEqual(checks[2], 1)
+
+    def test_sphere_search_known_spheres(self):
+        """Ensure a sphere search given known spheres finds the same spheres without testing locations before the
+        sphere they were known in."""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        locations = generate_locations(3, 1, menu)
+        items = generate_items(3, 1, True)
+        for location, item in zip(locations, items):
+            location.place_locked_item(item)
+
+        checks = Counter()
+
+        def rule(index: int, requirement: str):
+            def access_rule(state: CollectionState) -> bool:
+                checks[index] += 1
+                return not requirement or state.has(requirement, 1)
+            return access_rule
+
+        for index, requirement in enumerate(("", items[0].name, items[1].name)):
+            locations[index].access_rule = rule(index, requirement)
+
+        def get_spheres(search: SphereSearch):
+            spheres = []
+            while search.remaining:
+                sphere = search.next_sphere()
+                spheres.append(sphere)
+                for location in sphere:
+                    search.collect(location)
+            return spheres
+
+        known_spheres = get_spheres(SphereSearch(CollectionState(multiworld), locations))
+        self.assertEqual(known_spheres, [{location} for location in locations])
+        checks.clear()
+        self.assertEqual(get_spheres(SphereSearch(CollectionState(multiworld), locations, known_spheres)),
+                         known_spheres)
+        self.assertEqual(checks, {0: 1, 1: 1, 2: 1})
+
+
+class TestBitsetCollectionState(unittest.TestCase):
+    def test_copies_are_independent(self):
+        """Ensure writes to a copy of a BitsetCollectionState don't leak into the state it was copied from."""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        locations = generate_locations(2, 1, menu)
+        items = generate_items(2, 1, True)
+        for location, item in zip(locations, items):
+            location.place_locked_item(item)
+
+        state = BitsetCollectionState(multiworld)
+        state.collect(items[0], True, locations[0])
+        copy = state.copy()
+        copy.collect(items[0], True)
+        copy.collect(items[1], True, locations[1])
+
+        self.assertEqual(state.count(items[0].name, 1), 1)
+        self.assertEqual(copy.count(items[0].name, 1), 2)
+        self.assertFalse(state.has(items[1].name, 1))
+        self.assertTrue(copy.has_all([items[0].name, items[1].name], 1))
+        self.assertEqual(set(state.locations_checked), {locations[0]})
+        self.assertEqual(set(copy.locations_checked), set(locations))
+        self.assertEqual(dict(copy.prog_items[1]), {items[0].name: 2, items[1].name: 1})
+
+    def test_item_counts_like_counter(self):
+        """Ensure ItemCounts counts like a Counter, with a count of 0 being the same as a missing item."""
+        counts = ItemCounts(StateIndex())
+        counter = Counter()
+        for container in (counts, counter):
+            container.update(["Sword", "Sword", "Shield"])
+            container.update({"Bow": 1})
+            container.subtract(["Shield", "Bow", "Bow"])
+        self.assertEqual(dict(counts), {item: count for item, count in counter.items() if count})
+        self.assertIn("Bow", counts)
+        self.assertNotIn("Shield", counts)
+        self.assertIsNone(counts.get("Shield"))
+        self.assertEqual(counts.get("Sword", 0), 2)
+        self.assertEqual(counts.total(), counter.total())
+
+    def test_matches_collection_state(self):
+        """Ensure a BitsetCollectionState sweeps and reaches the same things as a CollectionState."""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest("Game", game=game_name):
+                multiworld = setup_solo_multiworld(world_type)
+                states = []
+                for state_type in (CollectionState, BitsetCollectionState):
+                    state = state_type(multiworld)
+                    for item in multiworld.itempool:
+                        if item.advancement:
+                            state.collect(item, True)
+                    state.sweep_for_advancements()
+                    states.append(state.copy())
+                state, bitset_state = states
+                self.assertEqual(set(state.advancements), set(bitset_state.advancements))
+                self.assertEqual(
+                    {location for location in multiworld.get_locations() if location.can_reach(state)},
+                    {location for location in multiworld.get_locations() if location.can_reach(bitset_state)},
+                )
+
+    def test_fill_matches_collection_state(self):
+        """Ensure generating with BitsetCollectionState as the state type places the items like CollectionState."""
+        world_types = [AutoWorldRegister.world_types[game]
+                       for game in ("Timespinner", "Timespinner", "Minecraft", "Subnautica")]
+        for seed in range(2):
+            with self.subTest(seed=seed):
+                placements = []
+                for state_type in (CollectionState, BitsetCollectionState):
+                    multiworld = setup_multiworld(world_types, (), seed)
+                    multiworld.state_type = state_type
+                    multiworld.state = state_type(multiworld)
+                    for step in gen_steps:
+                        call_all(multiworld, step)
+                    distribute_items_restrictive(multiworld)
+                    call_all(multiworld, "post_fill")
+                    balance_multiworld_progression(multiworld)
+                    self.assertIsInstance(multiworld.get_all_state(False), state_type)
+                    self.assertTrue(multiworld.can_beat_game())
+                    placements.append({(location.player, location.name): (location.item.player, location.item.name)
+                                       for location in multiworld.get_locations()})
+                self.assertEqual(placements[0], placements[1])
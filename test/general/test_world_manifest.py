@@ -0,0 +1,151 @@
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from Utils import local_path
+from worlds import WorldSource, manifest, network_data_package
+from worlds.AutoWorld import AutoWorldRegister, WorldTypes, data_package_checksum
+
+
+class TestWorldManifest(unittest.TestCase):
+    def test_manifest_matches_worlds(self) -> None:
+        """The manifest has to describe the worlds the same way importing them does."""
+        for game, entry in manifest.items():
+            with self.subTest(game=game):
+                world_type = AutoWorldRegister.world_types[game]
+                package = dict(entry["package"])
+                checksum = package.pop("checksum")
+                # some worlds' id tables are in a different order each run, so only compare checksums per process
+                imported_package = dict(world_type.get_data_package_data())
+                del imported_package["checksum"]
+                self.assertEqual(package, imported_package)
+                self.assertEqual(checksum, data_package_checksum(package))
+                self.assertEqual(network_data_package["games"][game], entry["package"])
+                self.assertEqual(entry["hidden"], world_type.hidden)
+
+    def test_imported_packages(self) -> None:
+        """A world source's manifest entry depends on the world packages it imports."""
+        with tempfile.TemporaryDirectory() as folder:
+            os.makedirs(os.path.join(folder, "sub"))
+            with open(os.path.join(folder, "__init__.py"), "w") as f:
+                f.write("import os\nfrom worlds.alttp.Items import ItemFactory\nfrom .sub import rules\n")
+            with open(os.path.join(folder, "sub", "rules.py"), "w") as f:
+                f.write("from ...generic.Rules import set_rule\nimport worlds.LauncherComponents\n")
+            self.assertEqual(WorldSource(folder, relative=False).imported_packages(),
+                             {"alttp", "generic", "LauncherComponents"})
+
+
+class TestWorldTypes(unittest.TestCase):
+    def test_deferred_load(self) -> None:
+        world_types = WorldTypes()
+        loads = []
+
+        def load_source() -> None:
+            loads.append("source")
+            world_types.register("Game 1", type("World1", (), {}))
+            world_types.register("Game 2", type("World2", (), {}))
+
+        world_types.defer(["Game 1", "Game 2"], load_source)
+        world_types.defer([], lambda: loads.append("side effects only"))
+        world_types.order = ["Game 1", "Game 2"]
+        self.assertIn("Game 2", world_types)
+        self.assertEqual(len(world_types), 2)
+        self.assertEqual(loads, [])
+
+        self.assertEqual(world_types["Game 2"].__name__, "World2")
+        self.assertEqual(loads, ["source"])
+        self.assertIsNone(world_types.get("Game 3"))
+        with self.assertRaises(KeyError):
+            _ = world_types["Game 3"]
+
+        self.assertEqual(list(world_types), ["Game 1", "Game 2"])
+        self.assertEqual(loads, ["source", "side effects only"])
+        with self.assertRaises(RuntimeError):
+            world_types.register("Game 1", type("World1", (), {}))
+
+    def test_concurrent_load(self) -> None:
+        """Threads looking up a game that is being imported wait for it instead of failing."""
+        world_types = WorldTypes()
+        loads = []
+        importing = threading.Event()
+
+        def load_source() -> None:
+            loads.append("source")
+            importing.set()
+            time.sleep(0.1)
+            world_types.register("Game 1", type("World1", (), {}))
+
+        world_types.defer(["Game 1"], load_source)
+        world_types.order = ["Game 1"]
+        with concurrent.futures.ThreadPoolExecutor(3) as pool:
+            first = pool.submit(lambda: world_types["Game 1"])
+            importing.wait()
+            lookups = [pool.submit(lambda: world_types["Game 1"]), pool.submit(world_types.load_all)]
+            self.assertIn("Game 1", world_types)
+            self.assertEqual(first.result().__name__, "World1")
+            self.assertEqual(lookups[0].result().__name__, "World1")
+            lookups[1].result()
+        self.assertEqual(loads, ["source"])
+
+
+# reports what world imports register as side effects, through the lookups the Launcher and clients use
+_registrations_script = """
+import asyncio
+import json
+import sys
+
+if sys.argv[1] == "launcher":
+    import Launcher
+from worlds._bizhawk.client import AutoBizHawkClientRegister
+from worlds.AutoSNIClient import AutoSNIClientRegister
+from worlds.Files import AutoPatchRegister
+from worlds.LauncherComponents import SuffixIdentifier, components
+
+asyncio.run(AutoBizHawkClientRegister.get_handler(None, "no system"))
+AutoPatchRegister.get_handler("no file")
+with open(sys.argv[2], "w") as f:
+    json.dump({
+        "components": [
+            [component.display_name, list(component.file_identifier.suffixes)
+             if isinstance(component.file_identifier, SuffixIdentifier) else None]
+            for component in components
+        ],
+        "bizhawk": {"/".join(systems): sorted(handlers) for systems, handlers in
+                    AutoBizHawkClientRegister.game_handlers.items()},
+        "sni": sorted(AutoSNIClientRegister.game_handlers),
+        "patch": sorted(AutoPatchRegister.patch_types),
+    }, f)
+"""
+
+
+class TestWarmStart(unittest.TestCase):
+    @staticmethod
+    def get_registrations(cache_dir: str, mode: str) -> dict:
+        env = {**os.environ, "XDG_CACHE_HOME": cache_dir}
+        output_path = os.path.join(cache_dir, "registrations.json")
+        subprocess.run([sys.executable, "-c", _registrations_script, mode, output_path], cwd=local_path(), env=env,
+                       stdin=subprocess.DEVNULL, capture_output=True, check=True)
+        with open(output_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_registrations_match_cold_start(self) -> None:
+        """Starting with a warm world manifest has to register the same components and handlers as importing all
+        worlds upfront, for the Launcher and for clients only looking up handlers."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold = self.get_registrations(cache_dir, "launcher")
+            self.assertTrue(os.path.isfile(os.path.join(cache_dir, "Archipelago", "world_manifest.json")))
+            self.assertTrue(cold["bizhawk"])
+            self.assertTrue(cold["sni"])
+            self.assertEqual(cold, self.get_registrations(cache_dir, "launcher"))
+
+            client = self.get_registrations(cache_dir, "client")
+            # the Launcher adds its own components after the worlds', the client imports the BizHawk component first
+            launcher_components = len(cold["components"]) - len(client["components"])
+            self.assertCountEqual(cold["components"][:-launcher_components], client["components"])
+            self.assertEqual({**cold, "components": None}, {**client, "components": None})
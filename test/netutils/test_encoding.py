@@ -0,0 +1,63 @@
+# Tests for NetUtils.encode and NetUtils.decode
+import unittest
+
+from NetUtils import ClientStatus, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, _decode, _encode, \
+    _scan_for_TypedTuples, decode, encode
+from Utils import Version
+
+items = [NetworkItem(item, 1000 + item, item % 3, item % 4) for item in range(100)]
+
+sample_messages = [
+    [{"cmd": "ReceivedItems", "index": 0, "items": items}],
+    [{"cmd": "ReceivedItems", "index": 12, "items": []}],
+    [{"cmd": "LocationInfo", "locations": tuple(items)}],
+    [{"cmd": "RoomUpdate", "hint_points": 5, "checked_locations": {3, 1, 2}}],
+    [{"cmd": "Connected", "team": 0, "slot": 1,
+      "players": [NetworkPlayer(0, 1, "Alias \"1\"", "Näme"), NetworkPlayer(0, 2, "Ünïcode", "Name")],
+      "missing_locations": list(range(20)), "checked_locations": [],
+      "slot_info": {1: NetworkSlot("Name", "Game", SlotType.player), 3: NetworkSlot("Group", "Game", SlotType.group,
+                                                                                   [1, 2])},
+      "slot_data": {"nested": [{"tuple": (1, 2)}, None, 1.5, True], "items": items[:3]},
+      "hint_points": 0}],
+    [{"cmd": "PrintJSON", "data": [{"text": "sent"}, {"type": "item_id", "text": "1", "flags": 1}],
+      "type": "ItemSend", "receiving": 1, "item": items[1]},
+     {"cmd": "RoomUpdate", "status": ClientStatus.CLIENT_GOAL, "mixed": [1, True, items[0]], "ints": (1, 2)}],
+    [{"cmd": "Retrieved", "keys": {"key": {"set": {1}, "list": [[1, 2], {"a": items[2]}]}}}],
+    [{"cmd": "Bounced", 1: "non-string key", "data": list(range(20))}],
+    [{"cmd": "Bounced", "data": [*range(20), None]}, {"cmd": "Bounced", "data": list(items[:10]) + [1]}],
+    {"cmd": "not a list"},
+]
+
+
+class TestEncode(unittest.TestCase):
+    def test_matches_scan_encoding(self) -> None:
+        """The fast paths produce the same JSON as copying everything through _scan_for_TypedTuples."""
+        for msgs in sample_messages:
+            with self.subTest(msgs=msgs):
+                self.assertEqual(encode(msgs), _encode(_scan_for_TypedTuples(msgs)))
+
+    def test_round_trip(self) -> None:
+        msgs = sample_messages[0] + sample_messages[4]
+        decoded = decode(encode(msgs))
+        self.assertEqual(decoded[0]["items"], items)
+        self.assertEqual(decoded[1]["players"][0], NetworkPlayer(0, 1, "Alias \"1\"", "Näme"))
+
+
+class TestDecode(unittest.TestCase):
+    def test_matches_hooked_decoding(self) -> None:
+        """Messages are decoded the same with and without skipping the object hook."""
+        for text in (
+            '[{"cmd":"LocationChecks","locations":[1,2,3]}]',
+            '[{"cmd":"Set","key":"key","operations":[{"operation":"replace","value":{"a":[1,{"b":null}]}}]}]',
+            '[{"cmd":"Connect","version":{"major":0,"minor":5,"build":1,"class":"Version"}}]',
+            '[{"cmd":"Say","text":"\\u00e4"}]',
+            '[{"cmd":"Sync","value":{"\\u0063lass":"NetworkItem","item":1,"location":2,"player":3,"flags":0}}]',
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(decode(text), _decode(text))
+
+    def test_typed_tuples(self) -> None:
+        self.assertEqual(decode('[{"version":{"major":0,"minor":5,"build":1,"class":"Version"}}]'),
+                         [{"version": Version(0, 5, 1)}])
+        self.assertEqual(decode('[{"\\u0063lass":"NetworkItem","item":1,"location":2,"player":3,"flags":0}]'),
+                         [NetworkItem(1, 2, 3, 0)])
@@ -3,7 +3,7 @@ import os
 import typing
 import unittest
 import warnings
-from NetUtils import LocationStore, _LocationStore
+from NetUtils import LocationStore, _LocationStore, locations_to_rows
 
 State = typing.Dict[typing.Tuple[int, int], typing.Set[int]]
 RawLocations = typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
@@ -117,6 +117,30 @@ class Base:
             self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
             self.assertEqual(self.store.get_for_player(9999), {})
 
+        def test_unindexed(self) -> None:
+            """Lookups without reverse indexes give the same results in the same order."""
+            unindexed = type(self.store)(sample_data, indexed=False)
+            for slots in (set(), {3}, {6}, {1, 2}, {2, 3, 4}, set(range(2048))):
+                for item in (1, 11, 13, 23, 99):
+                    self.assertEqual(list(self.store.find_item(slots, item)), list(unindexed.find_item(slots, item)))
+            for slot in range(7):
+                self.assertEqual(list(self.store.get_for_player(slot).items()),
+                                 list(unindexed.get_for_player(slot).items()))
+
+        def test_get_size(self) -> None:
+            unindexed = type(self.store)(sample_data, indexed=False)
+            self.assertGreater(self.store.get_size(), unindexed.get_size())
+
+        def test_from_rows(self) -> None:
+            """A store built from multidata rows is the same as one built from the dict."""
+            store = type(self.store).from_rows(locations_to_rows(sample_data), len(sample_data))
+            self.assertEqual(len(store), len(self.store))
+            for slot in sample_data:
+                self.assertEqual(sorted(store[slot].items()), sorted(self.store[slot].items()))
+                self.assertEqual(store.get_for_player(slot), self.store.get_for_player(slot))
+            for slots in ({3}, {2, 3, 4}, set(range(2048))):
+                self.assertEqual(sorted(store.find_item(slots, 99)), sorted(self.store.find_item(slots, 99)))
+
         def test_get_checked(self) -> None:
             self.assertEqual(self.store.get_checked(full_state, 0, 1), [11, 12, 13])
             self.assertEqual(self.store.get_checked(one_state, 0, 1), [12])
@@ -223,6 +247,16 @@ class Base:
                 self.assertEqual(store.get_remaining(empty_state, 0, 1), [])
                 self.assertEqual(store.get_remaining(full_state, 0, 1), [])
 
+        def test_rows_no_locations_for_1(self) -> None:
+            store = self.type.from_rows(locations_to_rows({2: {1: (1, 2, 3)}}), 2)
+            self.assertEqual(len(store), 2)
+            self.assertEqual(len(store[1]), 0)
+            self.assertEqual(len(store[2]), 1)
+
+        def test_rows_invalid_player(self) -> None:
+            with self.assertRaises(Exception):
+                self.type.from_rows(locations_to_rows({3: {1: (1, 1, 1)}}), 2)
+
         def test_no_locations_for_1(self) -> None:
             store = self.type({
                 1: {},
@@ -293,6 +327,12 @@ class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
                 1 << 32: {1: (1, 1, 1)},
             })
 
+    def test_rows_not_sorted(self) -> None:
+        rows = locations_to_rows(sample_data)
+        rows[0:5], rows[5:10] = rows[5:10], rows[0:5]
+        with self.assertRaises(ValueError):
+            self.type.from_rows(rows, len(sample_data))
+
     def test_not_a_tuple(self) -> None:
         with self.assertRaises(Exception):
             self.type({
@@ -0,0 +1,80 @@
+# Tests for NetUtils.MultiData and NetUtils.encode_multidata
+import array
+import pickle
+import unittest
+import zlib
+
+from MultiServer import Context
+from NetUtils import LocationStore, MultiData, NetworkSlot, SlotType, encode_multidata, multidata_format_version
+
+sample_multidata = {
+    "slot_data": {1: {"option": 1}, 2: {"option": 2}},
+    "slot_info": {1: NetworkSlot("A", "Game", SlotType.player), 2: NetworkSlot("B", "Game", SlotType.player)},
+    "locations": {1: {10: (20, 2, 0), 11: (21, 1, 1)}, 2: {}},
+    "spheres": [{1: {10}}, {1: {11}}],
+    "precollected_hints": {1: set(), 2: set()},
+    "datapackage": {"Game": {"checksum": "abc"}},
+    "seed_name": "seed",
+    "version": (0, 5, 1),
+}
+
+
+class TestMultiData(unittest.TestCase):
+    data: bytes
+
+    def setUp(self) -> None:
+        self.data = encode_multidata(sample_multidata)
+
+    def test_round_trip(self) -> None:
+        self.assertEqual(self.data[0], multidata_format_version)
+        multidata = Context.decompress(self.data)
+        self.assertIsInstance(multidata, MultiData)
+        self.assertEqual(dict(multidata), sample_multidata)
+        self.assertEqual(list(multidata), list(sample_multidata))
+
+    def test_old_format(self) -> None:
+        data = bytes([3]) + zlib.compress(pickle.dumps(sample_multidata), 9)
+        self.assertEqual(Context.decompress(data), sample_multidata)
+
+    def test_lazy(self) -> None:
+        """Only the sections of keys that get used are unpacked."""
+        multidata = MultiData(self.data)
+        self.assertIn("slot_data", multidata)
+        self.assertEqual(multidata["seed_name"], "seed")
+        self.assertEqual(multidata["slot_info"][2].name, "B")
+        self.assertNotIn("slot_data", multidata._values)
+        self.assertNotIn("locations", multidata._values)
+        self.assertEqual(multidata.decoded_size, sum(len(multidata._read(section)) for section in multidata._loaded))
+
+    def test_location_store(self) -> None:
+        multidata = MultiData(self.data)
+        store = multidata.pop_location_store()
+        self.assertIsInstance(store, LocationStore)
+        self.assertEqual(store[1][11], (21, 1, 1))
+        self.assertEqual(len(store[2]), 0)
+        self.assertNotIn("locations", multidata)
+
+    def test_location_rows(self) -> None:
+        """Locations are stored as (sender, location, item, receiver, flags) rows."""
+        rows = array.array("q")
+        rows.frombytes(MultiData(self.data)._read("locations"))
+        self.assertEqual(rows.tolist(), [1, 10, 20, 2, 0, 1, 11, 21, 1, 1])
+
+    def test_encode(self) -> None:
+        """Changed multidata encodes with its changes, unchanged sections are copied as they are."""
+        multidata = MultiData(self.data)
+        multidata["datapackage"]["Game"] = {"checksum": "abc", "version": 0}
+        multidata["connect_names"] = {"A": (0, 1)}
+        del multidata["spheres"]
+        encoded = multidata.encode()
+        self.assertIn(bytes(MultiData(self.data)._data[slice(*self.slot_data_range(self.data))]), encoded)
+
+        expected = dict(sample_multidata, datapackage={"Game": {"checksum": "abc", "version": 0}},
+                        connect_names={"A": (0, 1)})
+        del expected["spheres"]
+        self.assertEqual(dict(MultiData(encoded)), expected)
+
+    @staticmethod
+    def slot_data_range(data: bytes) -> tuple:
+        offset, size = MultiData(data)._sections["slot_data"]
+        return offset, offset + size
@@ -137,3 +137,30 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+
+class TestOutputArchive(unittest.TestCase):
+    def test_archive(self):
+        import zipfile
+        with TemporaryDirectory() as temp_dir:
+            zip_path = os.path.join(temp_dir, "AP_test.zip")
+            output_dir = os.path.join(temp_dir, "output")
+            os.mkdir(output_dir)
+            with open(os.path.join(output_dir, "spoiler.txt"), "w") as f:
+                f.write("text " * 100)
+            with zipfile.ZipFile(os.path.join(output_dir, "patch.apclique"), "w") as patch:
+                patch.writestr("patch.json", "{}")
+
+            with Main._OutputArchive(zip_path, 9) as archive:
+                archive.add_folder(output_dir)
+                self.assertEqual(os.listdir(output_dir), [], "added files should be cleaned up")
+                self.assertFalse(os.path.exists(zip_path), "archive should only be moved in place once done")
+
+            with zipfile.ZipFile(zip_path) as zf:
+                self.assertEqual(zf.getinfo("spoiler.txt").compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(zf.getinfo("patch.apclique").compress_type, zipfile.ZIP_STORED)
+
+            with self.assertRaises(ValueError):
+                with Main._OutputArchive(zip_path + "2", 9):
+                    raise ValueError
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["AP_test.zip", "output"])
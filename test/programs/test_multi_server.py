@@ -1,5 +1,11 @@
+import asyncio
+import pickle
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+
+from MultiServer import Client, Context, SaveJournal, ServerCommandProcessor, register_location_checks, send_items_to, \
+    send_new_items
+from NetUtils import Hint, HintStatus, LocationStore, NetworkItem, NetworkSlot, SlotType, decode, encode
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +44,274 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class DatalessContext(Context):
+    def _load_game_data(self) -> None:
+        pass  # the tested state does not need game data, so the world manifest does not have to be loaded
+
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        import os
+        import tempfile
+        self.ctx = DatalessContext("", 0, "", "", 0, 0, False)
+        self.ctx.save_journal = SaveJournal()
+        self.directory = tempfile.TemporaryDirectory()
+        self.ctx.save_filename = os.path.join(self.directory.name, "test.apsave")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def load(self) -> dict:
+        import zlib
+        from Utils import restricted_loads
+        with open(self.ctx.save_filename, "rb") as f:
+            savedata = restricted_loads(zlib.decompress(f.read()))
+        return SaveJournal.replay(savedata, self.ctx._read_journal())
+
+    def change(self, value: int) -> None:
+        ctx = self.ctx
+        ctx.location_checks[0, 1].add(value)
+        ctx.save_journal.check_locations(0, 1, {value})
+        ctx.received_items.setdefault((0, 2, True), []).append(NetworkItem(value, value, 1, 0))
+        ctx.stored_data["key"] = value
+        ctx.journal_change("stored_data", "key")
+        ctx.name_aliases[0, 1] = f"Alias {value}"
+
+    def assert_loads_current_state(self) -> None:
+        savedata, expected = self.load(), self.ctx.get_save()
+        for section in ("location_checks", "received_items", "stored_data", "name_aliases"):
+            self.assertEqual(savedata[section], expected[section], section)
+
+    def test_replay(self) -> None:
+        """Changes appended to the journal are restored on top of the snapshot."""
+        self.change(1)
+        self.assertTrue(self.ctx._save())
+        self.assertEqual(self.ctx._read_journal(), b"", "first save should write a snapshot")
+        for value in range(2, 5):
+            self.change(value)
+            self.assertTrue(self.ctx._save())
+            self.assert_loads_current_state()
+        self.assertNotEqual(self.ctx._read_journal(), b"")
+
+    def test_truncated_frame(self) -> None:
+        """A frame that was only partially written is ignored, keeping the earlier ones."""
+        self.change(1)
+        self.ctx._save()
+        self.change(2)
+        self.ctx._save()
+        self.assert_loads_current_state()
+        self.ctx._append_journal(pickle.dumps((self.ctx.save_journal.generation, [("stored_data", "key", 3)]))[:-2])
+        self.assertEqual(self.load()["stored_data"]["key"], 2)
+
+    def test_compaction(self) -> None:
+        """Once the journal outgrows the snapshot, it is folded into a new one, and stale frames are skipped."""
+        self.ctx.save_journal.min_compaction_size = 0
+        self.change(1)
+        self.ctx._save()
+        stale_frame = pickle.dumps((self.ctx.save_journal.generation, [("stored_data", "key", -1)]))
+        for value in range(2, 100):
+            self.change(value)
+            self.ctx._save()
+            if not self.ctx._read_journal():
+                break
+        else:
+            self.fail("journal was never compacted")
+        self.assertEqual(self.ctx.save_journal.generation, 2)
+        self.ctx._append_journal(stale_frame)
+        self.assert_loads_current_state()
+
+
+class TestBounceTargets(unittest.TestCase):
+    def test_index(self) -> None:
+        ctx = DatalessContext("", 0, "", "", 0, 0, False)
+        ctx.games = {1: "Game A", 2: "Game B", 3: "Game A"}
+        ctx.clients = {0: {1: [], 2: [], 3: []}, 1: {1: []}}
+        clients = {}
+        for team, slot, tags in ((0, 1, ["DeathLink"]), (0, 2, []), (0, 3, ["DeathLink", "Tracker"]), (1, 1, [])):
+            client = Client(None, ctx)
+            client.team, client.slot, client.tags = team, slot, tags
+            ctx.clients[team][slot].append(client)
+            ctx.index_client(client)
+            clients[team, slot] = client
+
+        self.assertEqual(ctx.get_bounce_targets(0, ["Game A"], [], []), {clients[0, 1], clients[0, 3]})
+        self.assertEqual(ctx.get_bounce_targets(0, [], ["DeathLink"], [2]), {clients[0, 1], clients[0, 2],
+                                                                             clients[0, 3]})
+        self.assertEqual(ctx.get_bounce_targets(1, ["Game A"], ["DeathLink"], []), {clients[1, 1]})
+        self.assertEqual(ctx.get_bounce_targets(0, ["Game C"], ["EnergyLink"], [4]), set())
+
+        ctx.unindex_client(clients[0, 1])
+        clients[0, 1].tags = []
+        ctx.index_client(clients[0, 1])
+        self.assertEqual(ctx.get_bounce_targets(0, [], ["DeathLink"], []), {clients[0, 3]})
+
+        ctx.clients[0][3].remove(clients[0, 3])
+        ctx.unindex_client(clients[0, 3])
+        self.assertEqual(ctx.get_bounce_targets(0, [], ["DeathLink", "Tracker"], []), set())
+        self.assertNotIn((0, "DeathLink"), ctx.clients_by_tag, "empty index entries should be removed")
+
+
+class TestSendNewItems(unittest.TestCase):
+    class Socket:
+        open = True
+
+        def __init__(self) -> None:
+            self.sent: typing.List[str] = []
+
+        async def send(self, msg: str) -> None:
+            self.sent.append(msg)
+
+    class Context(DatalessContext):
+        async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Client], msg: str) -> bool:
+            for endpoint in endpoints:
+                await endpoint.socket.send(msg)
+            return True
+
+    def setUp(self) -> None:
+        self.ctx = self.Context("", 0, "", "", 0, 0, False)
+        self.ctx.clients = {0: {1: [], 2: []}}
+        self.ctx.slot_info = {slot: NetworkSlot(f"Player{slot}", "Game A", SlotType.player) for slot in (1, 2)}
+        self.ctx.player_names = {(0, slot): f"Player{slot}" for slot in (1, 2)}
+        self.ctx.locations = LocationStore({1: {10: (1, 1, 0), 11: (2, 1, 0)}, 2: {}})
+        self.sockets = {}
+        for slot in (1, 2):
+            self.sockets[slot] = self.Socket()
+            client = Client(self.sockets[slot], self.ctx)
+            client.team, client.slot, client.items_handling, client.no_text = 0, slot, 0b111, True
+            self.ctx.clients[0][slot].append(client)
+
+    def test_coalesced_delivery(self) -> None:
+        """Items sent to a slot before delivering them reach its clients as a single ReceivedItems."""
+        async def release() -> None:
+            for location in range(3):
+                send_items_to(self.ctx, 0, 1, NetworkItem(location, location, 2, 0))
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)  # sending
+
+        asyncio.run(release())
+        self.assertEqual(len(self.sockets[1].sent), 1)
+        self.assertEqual([item.item for item in self.ctx.loader(self.sockets[1].sent[0])[0]["items"]], [0, 1, 2])
+        self.assertEqual(self.sockets[2].sent, [])
+        self.assertEqual(self.ctx.dirty_item_slots, set())
+
+    def test_delivery_order(self) -> None:
+        """New items are sent before the RoomUpdate of the checks that sent them."""
+        async def check() -> None:
+            register_location_checks(self.ctx, 0, 1, [10, 11])
+            await asyncio.sleep(0)  # sending
+
+        asyncio.run(check())
+        commands = [msg["cmd"] for sent in self.sockets[1].sent for msg in self.ctx.loader(sent)]
+        self.assertEqual(commands, ["ReceivedItems", "RoomUpdate"])
+
+    def test_without_event_loop(self) -> None:
+        """Server commands can send items outside of a running event loop."""
+        self.ctx.clients = {}
+        send_items_to(self.ctx, 0, 1, NetworkItem(1, -1, 0, 0))
+        send_new_items(self.ctx)
+        self.assertEqual(self.ctx.dirty_item_slots, set())
+
+
+class TestEncodedMessages(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ctx = DatalessContext("", 0, "", "", 0, 0, False)
+        self.ctx.gamespackage = {
+            "Archipelago": {"item_name_to_id": {"Nothing": -1}, "location_name_to_id": {}, "checksum": "ap"},
+            "Game A": {"item_name_to_id": {"Sword": 1}, "location_name_to_id": {"Chest": 2}, "checksum": "a"},
+            "Game B": {"item_name_to_id": {"Shield": 1}, "location_name_to_id": {"Pot": 3}},
+        }
+        self.ctx.games = {1: "Game A", 2: "Game B"}
+
+    def test_data_package(self) -> None:
+        """Spliced DataPackage messages match encoding the whole message at once."""
+        for games in (["Game A"], ["Game B", "Archipelago"], list(self.ctx.gamespackage), []):
+            expected = encode([{"cmd": "DataPackage",
+                                "data": {"games": {game: self.ctx.gamespackage[game] for game in games}}}])
+            self.assertEqual(self.ctx.get_data_package_msg(games), expected)
+            self.assertEqual(self.ctx.get_data_package_msg(games), expected, "cached fragments should not change")
+
+    def test_room_info(self) -> None:
+        self.ctx.hint_cost = 10
+        room_info = decode(self.ctx.get_room_info_msg())[0]
+        self.assertEqual(room_info["cmd"], "RoomInfo")
+        self.assertEqual(set(room_info["games"]), {"Archipelago", "Game A", "Game B"})
+        self.assertEqual(room_info["datapackage_checksums"], {"Archipelago": "ap", "Game A": "a"})
+        self.assertEqual(room_info["hint_cost"], 10)
+        self.ctx.hint_cost = 20
+        self.assertEqual(decode(self.ctx.get_room_info_msg())[0]["hint_cost"], 20, "options can change while hosting")
+
+    def test_stored_data_package(self) -> None:
+        """Data packages stored for their checksum are spliced in as stored, without encoding them."""
+        import json
+        import os
+        import tempfile
+        import Utils
+
+        game_data = {"item_name_to_id": {"Bow": 1}, "location_name_to_id": {"Tree": 4}, "checksum": "stored"}
+        self.ctx.gamespackage["Game C"] = game_data
+        stored = json.dumps(game_data, indent=1)
+        Utils.cache_path()  # resolve the cache folder, so it can be restored
+        original_cache_path = Utils.cache_path.cached_path
+        with tempfile.TemporaryDirectory() as cache_dir:
+            Utils.cache_path.cached_path = cache_dir
+            try:
+                Utils.store_encoded_data_package_for_checksum("Game C", "stored", stored)
+                self.assertEqual(Utils.load_encoded_data_package_for_checksum("Game C", "stored"), stored)
+                self.assertIsNone(Utils.load_encoded_data_package_for_checksum("Game C", "missing"))
+                msg = self.ctx.get_data_package_msg(["Game C"])
+
+                # truncated or edited files are not sent on
+                with open(Utils.cache_path("datapackage", "Game C", "stored.json"), "w", encoding="utf-8") as f:
+                    f.write(stored[:-10])
+                self.assertIsNone(Utils.load_encoded_data_package_for_checksum("Game C", "stored"))
+                Utils.store_data_package_for_checksum("Game C", {**game_data, "checksum": "other"})
+                os.replace(Utils.cache_path("datapackage", "Game C", "other.json"),
+                           Utils.cache_path("datapackage", "Game C", "stored.json"))
+                self.assertIsNone(Utils.load_encoded_data_package_for_checksum("Game C", "stored"))
+            finally:
+                Utils.cache_path.cached_path = original_cache_path
+        self.assertIn(stored, msg)
+        self.assertEqual(decode(msg)[0]["data"]["games"]["Game C"], game_data)
+
+
+class TestHintIndex(unittest.TestCase):
+    def test_recheck_location_hints(self) -> None:
+        ctx = DatalessContext("", 0, "", "", 0, 0, False)
+        checked = Hint(2, 1, 100, 1, False)
+        other_location = Hint(2, 1, 101, 2, False)
+        other_finder = Hint(1, 2, 100, 3, False)
+        ctx.hints[0, 1] = {checked, other_location, other_finder}
+        ctx.hints[0, 2] = {checked, other_location, other_finder}
+        ctx.hints[1, 1] = {checked}
+        ctx.rebuild_hint_index()
+
+        ctx.location_checks[0, 1].add(100)
+        changed = set()
+        ctx.recheck_location_hints(0, 1, [100], changed)
+        found = checked._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        for slot in (1, 2):
+            self.assertEqual(ctx.hints[0, slot], {found, other_location, other_finder})
+            self.assertIn(found, ctx.hints[0, slot])
+            self.assertNotIn(checked, ctx.hints[0, slot])
+        self.assertEqual(ctx.hints[1, 1], {checked}, "other teams' hints should not be touched")
+        self.assertNotIn((0, 1, 100), ctx.hint_index)
+        self.assertEqual(ctx.hint_index[0, 2, 100], {other_finder})
+
+
+class TestSphereIndex(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = DatalessContext("", 0, "", "", 0, 0, False)
+        self.assertEqual(ctx.get_sphere(1, 100), -1)
+        ctx.spheres = [{1: {100, 101}, 2: {200}}, {1: {102}}, {2: {201, 202}}]
+        ctx.sphere_index = ctx.build_sphere_index(ctx.spheres)
+        for i, sphere in enumerate(ctx.spheres):
+            for player, locations in sphere.items():
+                for location in locations:
+                    self.assertEqual(ctx.get_sphere(player, location), i)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(1, 200)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(3, 100)
@@ -93,3 +93,83 @@ class TestTracker(TestBase):
                 headers={"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00"},  # missing timezone
             )
             self.assertEqual(response.status_code, 400)
+
+    def test_tracker_data_cache(self) -> None:
+        """
+        Verify that decoded data is shared between requests until the room is saved again
+        """
+        import datetime
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with self.app.app_context(), db_session:
+            room = Room.get(id=self.room_id)
+            first = TrackerData(room)
+            second = TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first._multisave, second._multisave)
+            self.assertIs(first.item_id_to_name["Archipelago"], second.item_id_to_name["Archipelago"])
+
+            room.multisave = pickle.dumps({"name_aliases": {(0, 1): "Alias"}})
+            room.last_activity = room.last_activity + datetime.timedelta(seconds=1)
+            saved = TrackerData(room)
+            self.assertIs(first._multidata, saved._multidata)
+            self.assertEqual(saved.get_player_alias(0, 1), "Alias")
+
+    def test_tracker_data_cache_size(self) -> None:
+        """
+        Verify that cached multidata is charged for the sections decoded after it was cached
+        """
+        from types import SimpleNamespace
+        from MultiServer import Context as MultiServerContext
+        from NetUtils import encode_multidata
+        from WebHostLib.tracker import _TrackerDataCache, _load_multidata
+
+        room = SimpleNamespace(seed=SimpleNamespace(
+            multidata=encode_multidata(dict(MultiServerContext.decompress(self.data)))))
+        loads = []
+
+        def load_multidata():
+            loads.append("multidata")
+            return _load_multidata(room)
+
+        cache = _TrackerDataCache()
+        max_size = len(room.seed.multidata) + 10
+        multidata = cache.get("multidata", None, load_multidata, max_size)
+        self.assertEqual(cache.size, len(room.seed.multidata))
+        cache.get("other", None, lambda: (object(), 10), max_size)
+        self.assertEqual(cache.size, max_size)
+
+        _ = multidata["slot_data"]
+        cache.get("other", None, lambda: (object(), 10), max_size)
+        self.assertEqual(cache.size, 10, "the multidata outgrew the cache and should have been evicted")
+        cache.get("multidata", None, load_multidata, max_size)
+        self.assertEqual(loads, ["multidata", "multidata"])
+
+    def test_sphere_tracker(self) -> None:
+        """
+        Verify that the sphere tracker lists the checked locations by sphere
+        """
+        from pony.orm import db_session
+        from MultiServer import Context as MultiServerContext
+        from NetUtils import encode_multidata
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData, _tracker_data_cache
+
+        multidata = dict(MultiServerContext.decompress(self.data))
+        multidata["locations"] = {1: {10: (1, 1, 0), 11: (2, 1, 0), 12: (3, 1, 0), 13: (4, 1, 0)}}
+        multidata["spheres"] = [{1: {10, 13}}, {1: {11, 12}}]
+        _tracker_data_cache.clear()
+        with self.app.app_context(), self.app.test_request_context(), db_session:
+            room = Room.get(id=self.room_id)
+            room.seed.multidata = encode_multidata(multidata)
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {10, 12, 13}}})
+            tracker_data = TrackerData(room)
+            self.assertEqual(tracker_data.get_sphere_index(), {1: {10: 0, 13: 0, 11: 1, 12: 1}})
+            self.assertEqual(tracker_data.get_team_sphere_checks(0), [(0, 1, 10), (0, 1, 13), (1, 1, 12)])
+
+            response = self.client.get(url_for("get_multiworld_sphere_tracker", tracker=self.tracker_uuid))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_data(as_text=True).count("<td>Unknown Item"), 3)
+        _tracker_data_cache.clear()
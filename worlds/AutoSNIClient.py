@@ -58,6 +58,8 @@ class AutoSNIClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: SNIContext) -> Optional[SNIClient]:
+        from worlds.AutoWorld import AutoWorldRegister
+        AutoWorldRegister.world_types.load_all()  # handlers register when their world is imported
         for _game, handler in AutoSNIClientRegister.game_handlers.items():
             try:
                 if await handler.validate_rom(ctx):
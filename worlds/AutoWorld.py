@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
 import sys
+import threading
 import time
 from random import Random
 from dataclasses import make_dataclass
-from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, TextIO, Tuple,
-                    TYPE_CHECKING, Type, Union)
+from typing import (AbstractSet, Any, Callable, ClassVar, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set,
+                    TextIO, Tuple, TYPE_CHECKING, Type, Union)
 
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
 from BaseClasses import CollectionState
@@ -21,8 +23,117 @@ if TYPE_CHECKING:
 perf_logger = logging.getLogger("performance")
 
 
+class WorldTypes(Dict[str, "Type[World]"]):
+    """Registered World types by game name, including worlds known from the world manifest that are not imported yet.
+
+    Looking up or testing for a single game only imports that game's world source,
+    while iterating imports all remaining world sources, so the result is the same as importing everything upfront.
+    Deferred imports are thread-safe, another thread looking up a game that is being imported waits for it.
+    """
+    order: List[str]
+    """game names in the order they would be registered in, if all worlds were imported upfront"""
+    _pending: Dict[str, Callable[[], Any]]
+    _pending_loads: List[Callable[[], Any]]
+    _lock: threading.RLock
+    """held while importing deferred world sources, re-entrant as world sources may look up other games"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.order = []
+        self._pending = {}
+        self._pending_loads = []
+        self._lock = threading.RLock()
+
+    def defer(self, games: Iterable[str], load: Callable[[], Any]) -> None:
+        """Registers games that will be provided by calling load on first access."""
+        for game in games:
+            self._pending[game] = load
+        self._pending_loads.append(load)
+
+    def register(self, game: str, world_type: Type[World]) -> None:
+        if super().__contains__(game):
+            raise RuntimeError(f"""Game {game} already registered.""")
+        self._pending.pop(game, None)  # world was imported directly
+        super().__setitem__(game, world_type)
+
+    def loaded(self) -> List[str]:
+        """Names of games that are already imported."""
+        return list(super().keys())
+
+    def is_pending(self, game: str) -> bool:
+        return game in self._pending
+
+    def load_all(self) -> None:
+        if not self._pending_loads:
+            return
+        with self._lock:
+            if not self._pending_loads:
+                return  # loaded by another thread while waiting
+            while self._pending_loads:
+                self._load(self._pending_loads[0])
+            # restore the order of importing everything upfront
+            position = {game: index for index, game in enumerate(self.order)}
+            world_types = sorted(super().items(), key=lambda item: position.get(item[0], len(position)))
+            super().clear()
+            super().update(world_types)
+
+    def _load(self, load: Callable[[], Any]) -> None:
+        with self._lock:
+            if load not in self._pending_loads:
+                return  # loaded by another thread while waiting
+            self._pending_loads.remove(load)
+            for game in [game for game, game_load in self._pending.items() if game_load is load]:
+                del self._pending[game]
+            load()
+
+    def __missing__(self, game: str) -> Type[World]:
+        with self._lock:
+            if super().__contains__(game):
+                return super().__getitem__(game)  # loaded by another thread while waiting
+            load = self._pending.get(game)
+            if load is None:
+                raise KeyError(game)
+            self._load(load)
+            return super().__getitem__(game)
+
+    def __contains__(self, game: object) -> bool:
+        if super().__contains__(game) or game in self._pending:
+            return True
+        with self._lock:  # a game being imported is in neither for a moment
+            return super().__contains__(game) or game in self._pending
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._pending)
+
+    def __iter__(self) -> Iterator[str]:
+        self.load_all()
+        return super().__iter__()
+
+    def get(self, game: str, default: Any = None) -> Any:
+        try:
+            return self[game]
+        except KeyError:
+            return default
+
+    def keys(self):  # type: ignore[override]
+        self.load_all()
+        return super().keys()
+
+    def values(self):  # type: ignore[override]
+        self.load_all()
+        return super().values()
+
+    def items(self):  # type: ignore[override]
+        self.load_all()
+        return super().items()
+
+    def __repr__(self) -> str:
+        self.load_all()
+        return super().__repr__()
+
+
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: WorldTypes = WorldTypes()
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -84,9 +195,7 @@ class AutoWorldRegister(type):
         # construct class
         new_class = super().__new__(mcs, name, bases, dct)
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
-                raise RuntimeError(f"""Game {dct["game"]} already registered.""")
-            AutoWorldRegister.world_types[dct["game"]] = new_class
+            AutoWorldRegister.world_types.register(dct["game"], new_class)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if ".apworld" in new_class.__file__:
             new_class.zip_path = pathlib.Path(new_class.__file__).parents[1]
@@ -176,9 +285,32 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
-def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
+def call_all(multiworld: "MultiWorld", method_name: str, *args: Any,
+             pool: Optional[concurrent.futures.Executor] = None) -> None:
+    """Calls method_name on all worlds in player order, then its stage_ classmethod on all world types.
+    With a pool, worlds that are parallel_stage_safe run in it first, see there for what they may do.
+    As they can't use multiworld.random, the worlds that run one after another afterwards
+    get the same random state as without a pool."""
     world_types: Set[AutoWorldRegister] = set()
+    if not getattr(sys, "_is_gil_enabled", lambda: True)():
+        pool = None  # the parallel_stage_safe contract relies on the GIL
+    parallel_players = [player for player in multiworld.player_ids
+                        if pool and multiworld.worlds[player].parallel_stage_safe]
+    if parallel_players:
+        multiworld.random.passthrough = False
+        try:
+            futures = [pool.submit(call_single, multiworld, method_name, player, *args)
+                       for player in parallel_players]
+            concurrent.futures.wait(futures)
+        finally:
+            multiworld.random.passthrough = True
+        for player, future in zip(parallel_players, futures):
+            world_types.add(multiworld.worlds[player].__class__)
+            future.result()  # raise the first exception in player order
+
     for player in multiworld.player_ids:
+        if player in parallel_players:
+            continue
         prev_item_count = len(multiworld.itempool)
         world_types.add(multiworld.worlds[player].__class__)
         call_single(multiworld, method_name, player, *args)
@@ -303,6 +435,25 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    parallel_stage_safe: ClassVar[bool] = False
+    """If True, generate_early, create_regions, set_rules and connect_entrances may run in parallel with other worlds,
+    when enabled in host.yaml. These methods then run in a worker thread at the same time as those of other players,
+    so they have to keep to the following:
+
+    * use self.random, as multiworld.random is unavailable while they run.
+    * only write to the multiworld through entries of this world's own player, such as its own regions via
+      multiworld.regions.append/extend, multiworld.completion_condition[self.player],
+      multiworld.register_indirect_condition for its own entrances
+      and its own options. Reading other players' data is not allowed, as it may still be in the making.
+    * not touch the itempool, precollected items, multiworld.random or anything else that is not keyed by player,
+      and not read-then-write shared state (e.g. check a dict for a key, then add it).
+    * guard class level caches shared between instances of the world with a lock.
+
+    The multiworld itself does no locking: writes of different players to the same dict only stay consistent
+    because single dict and set operations are atomic under the GIL. On interpreters without a GIL,
+    these stages therefore run one after another regardless of this flag.
+    As the stages still share the GIL, opting in only saves time for stages that wait on I/O or release the GIL."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
@@ -530,6 +681,16 @@ class World(metaclass=AutoWorldRegister):
             return True
         return False
 
+    def get_location_dependencies(self) -> Optional[Mapping[str, AbstractSet["Location"]]]:
+        """
+        Optional reverse index from an item name to this world's locations whose access can change when this player
+        collects or removes that item. When provided, sweeps only recheck the locations depending on what was just
+        collected instead of every remaining location.
+        Only provide it if the locations' reachability depends on nothing but this player's items, locations not in
+        the index are considered to never change.
+        """
+        return None
+
     # following methods should not need to be overridden.
     def create_filler(self) -> "Item":
         return self.create_item(self.get_filler_item_name())
@@ -1,15 +1,20 @@
 import importlib
 import importlib.util
+import hashlib
+import json
 import logging
 import os
+import re
 import sys
 import warnings
+import zipfile
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict
+import functools
+from typing import Any, Dict, List, Optional, Set, TypedDict
 
-from Utils import local_path, user_path
+from Utils import __version__, cache_path, local_path, store_encoded_data_package_for_checksum, user_path
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,6 +32,7 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "manifest",
 }
 
 
@@ -45,12 +51,60 @@ class DataPackage(TypedDict):
     games: Dict[str, GamesPackage]
 
 
+class WorldSourceManifestEntry(TypedDict):
+    fingerprint: str
+    components: List[str]  # display names of the Launcher components registered while importing it
+    requires: List[str]  # resolved paths of the other world sources it imports
+
+
+class WorldManifestEntry(TypedDict):
+    source: str  # resolved path of the world source registering the game
+    hidden: bool
+    settings_key: Optional[str]  # None if the world does not declare settings
+    package: GamesPackage
+
+
+def _file_fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _tree_fingerprint(path: str) -> str:
+    """Changes whenever a file in the folder changes, is added or removed."""
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = [name for name in dirs if name != "__pycache__"]
+        for name in names:
+            file_path = os.path.join(root, name)
+            files.append(f"{os.path.relpath(file_path, path)}:{_file_fingerprint(file_path)}")
+    return hashlib.sha1("\n".join(sorted(files)).encode()).hexdigest()
+
+
+def _core_fingerprint() -> str:
+    """Changes whenever code shared by all worlds changes: the modules of Archipelago and of this package, and the
+    packages in here that are not world sources, like _bizhawk."""
+    files = []
+    for folder in (os.path.dirname(local_folder), local_folder):
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.endswith(".py"):
+                files.append(f"{entry.path}:{_file_fingerprint(entry.path)}")
+            elif folder == local_folder and entry.is_dir() and entry.name.startswith("_") \
+                    and entry.name != "__pycache__":
+                files.append(f"{entry.path}:{_tree_fingerprint(entry.path)}")
+    return hashlib.sha1("\n".join(sorted(files)).encode()).hexdigest()
+
+
+# finds imports of other world packages, like "from worlds.alttp import" or "from ..generic.Rules import".
+# Relative imports from subpackages may also match the world's own modules, which only invalidates more often.
+_world_import_pattern = re.compile(rb"(?:\bworlds\.|\bfrom \.{2,})(\w+)")
+
+
 @dataclasses.dataclass(order=True)
 class WorldSource:
     path: str  # typically relative path from this module
     is_zip: bool = False
     relative: bool = True  # relative to regular world import folder
-    time_taken: float = -1.0
+    time_taken: float = -1.0  # stays -1 if the world was resolved through the manifest and not imported yet
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -61,7 +115,41 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def module_name(self) -> str:
+        return f"worlds.{os.path.basename(self.path).rsplit('.', 1)[0]}"
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever a file of the world source changes, is added or removed."""
+        path = self.resolved_path
+        if self.is_zip:
+            return _file_fingerprint(path)
+        return _tree_fingerprint(path)
+
+    def imported_packages(self) -> Set[str]:
+        """Names of the packages in worlds that the code of the world source mentions importing."""
+        path = self.resolved_path
+        names: Set[str] = set()
+        if self.is_zip:
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if info.filename.endswith(".py"):
+                        names.update(match.decode() for match in _world_import_pattern.findall(zf.read(info)))
+        else:
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [name for name in dirs if name != "__pycache__"]
+                for name in files:
+                    if name.endswith(".py"):
+                        with open(os.path.join(root, name), "rb") as f:
+                            names.update(match.decode() for match in _world_import_pattern.findall(f.read()))
+        return names
+
     def load(self) -> bool:
+        if self.is_zip and self.module_name in sys.modules:
+            # imported directly, before its turn, by another world or a client.
+            # Folders are imported again below, which returns the module once another thread finished importing it.
+            return True
         try:
             start = time.perf_counter()
             if self.is_zip:
@@ -115,15 +203,169 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
-world_sources.sort()
-for world_source in world_sources:
-    world_source.load()
+# The world manifest caches what importing each world source registers, so unchanged worlds are only imported once
+# they are actually used. It is invalidated per world source by file modification times and sizes, of the world
+# source itself and of the other world sources it imports, and as a whole whenever the shared code changes.
+manifest_path = cache_path("world_manifest.json")
+manifest_version = 2
+manifest: Dict[str, WorldManifestEntry] = {}
+"""game name -> manifest entry, for all worlds that registered, whether they are imported or not"""
+component_order: List[str] = []
+"""display names of the Launcher components, in the order importing all world sources upfront registers them"""
+
+
+def _read_manifest(header: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.debug(f"Could not read world manifest: {e}")
+        return {}
+    if cached.get("header") != header:
+        return {}
+    return cached
+
+
+def _write_manifest(header: Dict[str, Any], sources: Dict[str, WorldSourceManifestEntry]) -> None:
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"header": header, "sources": sources, "games": manifest}, f, separators=(",", ":"))
+        os.replace(temp_path, manifest_path)
+    except Exception as e:
+        logging.debug(f"Could not write world manifest: {e}")
+
+
+def _build_manifest_entry(world_source: WorldSource, world: "AutoWorldRegister") -> WorldManifestEntry:
+    from NetUtils import encode
+    annotation = world.__annotations__.get("settings", None)
+    has_settings = annotation is not None and annotation != "ClassVar[Optional['Group']]"
+    package = world.get_data_package_data()
+    # store the package the way servers send it, without groups, so they and clients can use it without encoding it
+    network_package = {key: value for key, value in package.items()
+                       if key not in ("item_name_groups", "location_name_groups")}
+    store_encoded_data_package_for_checksum(world.game, package["checksum"], encode(network_package))
+    return {
+        "source": world_source.resolved_path,
+        "hidden": world.hidden,
+        "settings_key": world.settings_key if has_settings else None,
+        "package": package,
+    }
+
+
+def _owns(world_source: WorldSource, world: "AutoWorldRegister") -> bool:
+    return world.__module__ == world_source.module_name or world.__module__.startswith(world_source.module_name + ".")
+
+
+def _load_deferred(world_source: WorldSource, games: List[str]) -> None:
+    if world_source.load():
+        for game in games:
+            world = AutoWorldRegister.world_types.get(game)
+            if world is None:
+                continue
+            # some worlds build their id tables in a different order each run, which changes the checksum.
+            # Only compare the order, encoding the package again to get its checksum is what the manifest avoids.
+            package = manifest[game]["package"]
+            if list(world.item_name_to_id.items()) != list(package["item_name_to_id"].items()) or \
+                    list(world.location_name_to_id.items()) != list(package["location_name_to_id"].items()):
+                package = world.get_data_package_data()
+                manifest[game]["package"] = package
+                network_data_package["games"][game] = package
+
+
+def _restore_component_order() -> None:
+    """Puts the Launcher components back into the order importing all world sources upfront registers them in,
+    as deferred world sources only register theirs once they are imported."""
+    from .LauncherComponents import components
+    position = {name: index for index, name in enumerate(component_order)}
+    components.sort(key=lambda component: position.get(component.display_name, len(position)))
+
+
+def _load_world_sources() -> None:
+    """Imports changed world sources to trigger AutoWorldRegister and defers importing unchanged ones."""
+    from .LauncherComponents import components
+
+    header = {
+        "version": manifest_version,
+        "archipelago": __version__,
+        "python": list(sys.version_info[:2]),
+        # changes to the code shared by worlds may change registration and data packages
+        "core": _core_fingerprint(),
+    }
+    cached = _read_manifest(header)
+    cached_sources: Dict[str, WorldSourceManifestEntry] = cached.get("sources", {})
+    cached_games: Dict[str, List[str]] = {}
+    for game, entry in cached.get("games", {}).items():
+        cached_games.setdefault(entry["source"], []).append(game)
+    fingerprints: Dict[str, str] = {}
+    for world_source in world_sources:
+        try:
+            fingerprints[world_source.resolved_path] = world_source.fingerprint
+        except OSError:
+            fingerprints[world_source.resolved_path] = ""
+    # a world source is only up to date if the world sources it imports are up to date as well
+    up_to_date = {path for path, fingerprint in fingerprints.items()
+                  if fingerprint and path in cached_sources and cached_sources[path]["fingerprint"] == fingerprint}
+    while True:
+        outdated = {path for path in up_to_date if not up_to_date.issuperset(cached_sources[path]["requires"])}
+        if not outdated:
+            break
+        up_to_date -= outdated
+    package_paths = {world_source.module_name.split(".", 1)[1]: world_source.resolved_path
+                     for world_source in world_sources}
+
+    sources: Dict[str, WorldSourceManifestEntry] = {}
+    changed = set(cached_sources) != set(fingerprints)
+    deferred = False
+    world_types = AutoWorldRegister.world_types
+    component_order[:] = [component.display_name for component in components]
+
+    for world_source in world_sources:
+        path = world_source.resolved_path
+        if path in up_to_date:
+            games = cached_games.get(path, [])
+            world_types.defer([game for game in games if game not in world_types],
+                              functools.partial(_load_deferred, world_source, games))
+            deferred = True
+            manifest.update((game, cached["games"][game]) for game in games)
+            sources[path] = cached_sources[path]
+            source_components = sources[path]["components"]
+        else:
+            changed = True
+            registered = len(components)
+            loaded = world_source.load()
+            source_components = [component.display_name for component in components[registered:]]
+            if loaded:
+                for game in world_types.loaded():
+                    if game not in manifest and _owns(world_source, world_types[game]):
+                        manifest[game] = _build_manifest_entry(world_source, world_types[game])
+                if fingerprints[path]:
+                    sources[path] = {
+                        "fingerprint": fingerprints[path],
+                        "components": source_components,
+                        "requires": sorted(package_paths[name] for name in world_source.imported_packages()
+                                           if name in package_paths and package_paths[name] != path),
+                    }
+        component_order.extend(name for name in source_components if name not in component_order)
+    world_types.order = list(manifest)
+    if deferred:
+        # runs after the deferred world sources when loading all of them
+        world_types.defer([], _restore_component_order)
+
+    if changed:
+        _write_manifest(header, sources)
+
 
-# Build the data package for each game.
 from .AutoWorld import AutoWorldRegister
 
+world_sources.sort()
+_load_world_sources()
+
+# The data package for each game.
 network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    "games": {world_name: entry["package"] for world_name, entry in manifest.items()},
 }
 
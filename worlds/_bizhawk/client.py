@@ -55,6 +55,8 @@ class AutoBizHawkClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: "BizHawkClientContext", system: str) -> BizHawkClient | None:
+        from worlds.AutoWorld import AutoWorldRegister
+        AutoWorldRegister.world_types.load_all()  # handlers register when their world is imported
         for systems, handlers in AutoBizHawkClientRegister.game_handlers.items():
             if system in systems:
                 for handler in handlers.values():
@@ -1,4 +1,6 @@
-from BaseClasses import Item, MultiWorld, Region
+from typing import AbstractSet, ClassVar, Mapping, Optional
+
+from BaseClasses import CollectionState, Item, Location, MultiWorld, Region
 from worlds.AutoWorld import World
 
 from .web_world import Web
@@ -8,6 +10,8 @@ from .location import LocationData
 from .entrances import EntranceData
 from .events import EventData
 from .rules import Rule
+from .graph import LogicGraph
+from .settings import Settings
 
 class DeathsDoorWorld(World):
     """
@@ -23,21 +27,29 @@ class DeathsDoorWorld(World):
     settings_key = "deaths_door_options"
     options_dataclass = Options
     options: Options # type: ignore
+    settings: ClassVar[Settings] # type: ignore
 
     web = Web()
 
     item_name_to_id = ItemData.name_to_id_dict()
     location_name_to_id = LocationData.name_to_id_dict()
 
+    _location_dependencies: Optional[dict[str, set[Location]]]
+
     def __init__(self, multiworld: MultiWorld, player: int):
         Rule.load()
         super().__init__(multiworld, player)
+        self._location_dependencies = None
 
     @classmethod
     def stage_assert_generate(cls, multiworld: MultiWorld) -> None:
         pass
 
     def create_regions(self) -> None:
+        if self.settings.graph_mode:
+            self._create_graph_regions()
+            return
+
         menu_region = Region("Menu", self.player, self.multiworld)
 
         for loc_data in LocationData.get_data():
@@ -52,6 +64,31 @@ class DeathsDoorWorld(World):
             menu_region.locations.append(loc)
 
         self.multiworld.regions.append(menu_region)
+
+        # Everything is in the menu, so the locations only depend on the items mentioned by their rules.
+        self._location_dependencies = {}
+        for loc in menu_region.locations:
+            for name in loc.data.rule.dependencies():
+                self._location_dependencies.setdefault(name, set()).add(loc)
+
+    def _create_graph_regions(self) -> None:
+        graph = LogicGraph.get()
+        regions = graph.create_regions(self.multiworld, self.player)
+
+        # Transitions are regions of the graph, only the locations and events are placed.
+        for loc_data in LocationData.get_data():
+            placement = graph.place(loc_data.rule)
+            region = regions[placement.parent]
+            loc = loc_data.to_game_location(self.player, region)
+            loc.access_rule = lambda state, rule=placement.rule: rule(state, self.player)
+            region.locations.append(loc)
+
+        for evt_data in EventData.get_data():
+            placement = graph.place(evt_data.rule)
+            region = regions[placement.parent]
+            loc = evt_data.to_game_event(self.player, region)
+            loc.access_rule = lambda state, rule=placement.rule: rule(state, self.player)
+            region.locations.append(loc)
     
     def create_item(self, name: str) -> Item:
         item = ItemData.from_name(name)
@@ -68,6 +105,21 @@ class DeathsDoorWorld(World):
             for _ in range(item.count):
                 self.multiworld.itempool.append(self.create_item(item.name))
     
+    def collect(self, state: CollectionState, item: Item) -> bool:
+        changed = super().collect(state, item)
+        if changed:
+            state._deaths_door_region_cache[self.player].clear()
+        return changed
+
+    def remove(self, state: CollectionState, item: Item) -> bool:
+        changed = super().remove(state, item)
+        if changed:
+            state._deaths_door_region_cache[self.player].clear()
+        return changed
+
+    def get_location_dependencies(self) -> Optional[Mapping[str, AbstractSet[Location]]]:
+        return self._location_dependencies
+
     def set_rules(self) -> None:
         self.multiworld.completion_condition[self.player] = lambda state: state.has(self.options.target.to_event_name(), self.player) 
     
@@ -1,5 +1,6 @@
 from abc import ABC
 import json
+import threading
 from pathlib import Path
 from typing import ClassVar, Optional, Self
 
@@ -9,6 +10,7 @@ class Data(ParseObjectHook, ABC):
     _loaded_data: ClassVar[Optional[list[Self]]] = None
     data_dir: ClassVar[Path] = Path(__file__).parent.parent / "data"
     data_file: ClassVar[str]
+    _load_lock: ClassVar[threading.RLock] = threading.RLock()
 
     @classmethod
     def get_data(cls) -> list[Self]:
@@ -21,5 +23,17 @@ class Data(ParseObjectHook, ABC):
         if cls._loaded_data is not None:
             return
 
-        with (cls.data_dir / cls.data_file).open() as file:
-            cls._loaded_data = json.load(file, object_hook=cls.object_hook)
+        with cls._load_lock:
+            if cls._loaded_data is not None:
+                return
+            compiled = cls.load_compiled()
+            if compiled is not None:
+                cls._loaded_data = compiled
+                return
+            with (cls.data_dir / cls.data_file).open() as file:
+                cls._loaded_data = json.load(file, object_hook=cls.object_hook)
+
+    @classmethod
+    def load_compiled(cls) -> Optional[list[Self]]:
+        """Load the data from the precompiled logic instead of the JSON file, when supported."""
+        return None
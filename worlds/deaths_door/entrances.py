@@ -1,9 +1,10 @@
-from typing import Any, Optional
+from typing import Any, Optional, Self
 
 from BaseClasses import Item, ItemClassification, Location, Region
 
 from .abc import Data, ParseObjectHook
 from .rules import Rule
+from .logic import PrecompiledLogic
 from .extract import TermDefinition, RuleJsonSerializer
 
 class EntranceData(Data, ParseObjectHook):
@@ -21,6 +22,13 @@ class EntranceData(Data, ParseObjectHook):
     def to_game_transition(self, player: int, parent: Region) -> "EntranceLocation":
         return EntranceLocation(self, player, parent)
 
+    @classmethod
+    def load_compiled(cls) -> Optional[list[Self]]:
+        definitions = PrecompiledLogic.section(cls.data_file)
+        if definitions is None:
+            return None
+        return [cls(definition.to_name(), Rule(definition.rule)) for definition in definitions]
+
     @classmethod
     def object_hook(cls, dict: dict[Any, Any]) -> Any:
         definition = RuleJsonSerializer.object_hook(dict)
@@ -1,10 +1,11 @@
-from typing import Any, Optional
+from typing import Any, Optional, Self
 
 from BaseClasses import Item, Location, ItemClassification, Region
 
 from .extract import RuleJsonSerializer, TermDefinition
 from .abc import Data
 from .rules import Rule
+from .logic import PrecompiledLogic
 
 class EventData(Data):
     data_file = "events.json"
@@ -21,6 +22,13 @@ class EventData(Data):
     def to_game_event(self, player: int, parent: Region) -> "EventLocation":
         return EventLocation(self, player, parent)
 
+    @classmethod
+    def load_compiled(cls) -> Optional[list[Self]]:
+        definitions = PrecompiledLogic.section(cls.data_file)
+        if definitions is None:
+            return None
+        return [cls(definition.to_name(), Rule(definition.rule)) for definition in definitions]
+
     @classmethod
     def object_hook(cls, dict: dict[Any, Any]) -> Any:
         definition = RuleJsonSerializer.object_hook(dict)
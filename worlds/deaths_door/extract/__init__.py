@@ -1,2 +1,3 @@
 # type: ignore
 from .parser.rule import Conjunction, Disjunction, Null, Group, Rule, RuleJsonSerializer, Term, TermDefinition, TermModifierOperator, Boolean
+from .parser.compiled import LogicEncoder, LogicDecoder
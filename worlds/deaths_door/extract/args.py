@@ -10,6 +10,7 @@ class Args:
     commit: str
     path: str
     output: str
+    check: bool
 
     def __init__(self):
         parser = ArgumentParser(
@@ -38,6 +39,12 @@ class Args:
             help=f"Output location of the extracted logic. (default={OUTPUT})"
         )
 
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Verify the precompiled logic matches the JSON files in the output location instead of extracting."
+        )
+
         parser.parse_args(namespace=self)
 
     def url(self) -> str:
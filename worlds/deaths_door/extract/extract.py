@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 
+import hashlib
 import json
+import sys
 from pathlib import Path
 from urllib import request
 
 from args import Args
 from parser import Lexer, Parser
 from parser.rule import TermDefinition, RuleJsonSerializer
+from parser.compiled import LogicEncoder
 
 LOCATIONS = "locations"
 EVENTS = "events"
 REGIONS = "regions"
 ENTRANCES = "entrances"
+COMPILED = "logic.json"
 
 LOGIC_FILES: list[tuple[str, str]] = [
     (LOCATIONS, "locations.txt"),
@@ -84,9 +88,47 @@ def save_to_file(dir: Path, content: dict[str, list[TermDefinition]]):
             print(f"  Saving logic to {file}")
             json.dump(inner_content, f, indent=2, cls=RuleJsonSerializer)
 
+def compile_logic(dir: Path, sections: list[str]) -> dict:
+    sources: dict[str, str] = {}
+    content: dict[str, list[TermDefinition]] = {}
+    for name in sections:
+        raw = (dir / f"{name}.json").read_bytes()
+        sources[name] = hashlib.sha1(raw).hexdigest()
+        content[name] = json.loads(raw, object_hook=RuleJsonSerializer.object_hook)
+    return LogicEncoder().encode(content, sources)
+
+def save_compiled(dir: Path, sections: list[str]):
+    print(f"==> Saving precompiled logic")
+    file = dir / COMPILED
+    with file.open("w") as f:
+        print(f"  Saving precompiled logic to {file}")
+        json.dump(compile_logic(dir, sections), f, separators=(",", ":"))
+
+def check_compiled(dir: Path, sections: list[str]) -> bool:
+    print(f"==> Checking precompiled logic")
+    file = dir / COMPILED
+    if not file.exists():
+        print(f"  Missing {file}")
+        return False
+
+    with file.open() as f:
+        compiled = json.load(f)
+    expected = compile_logic(dir, sections)
+    for key in expected:
+        if compiled.get(key) != expected[key]:
+            print(f"  {file} is out of date ({key} differs), run the extraction again.")
+            return False
+    print(f"  {file} matches the JSON files.")
+    return True
+
 def main(args: Args):
+    output = Path(args.output)
+    if args.check:
+        sys.exit(0 if check_compiled(output, [LOCATIONS, EVENTS, REGIONS, ENTRANCES]) else 1)
+
     terms_map = process_files(args.url(), LOGIC_FILES)
-    save_to_file(Path(args.output), terms_map)
+    save_to_file(output, terms_map)
+    save_compiled(output, list(terms_map.keys()))
 
 if __name__ == "__main__":
     main(Args())
\ No newline at end of file
@@ -1,3 +1,3 @@
-from . import rule
+from . import rule, compiled
 from .lexer import Lexer
 from .parser import Parser
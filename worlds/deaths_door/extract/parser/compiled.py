@@ -0,0 +1,122 @@
+from enum import IntEnum
+from typing import Any, Optional
+
+from . import rule
+
+FORMAT_VERSION: int = 1
+
+class Op(IntEnum):
+    Null = 0
+    BooleanFalse = 1
+    BooleanTrue = 2
+    Group = 3
+    Conjunction = 4
+    Disjunction = 5
+    Term = 6          # Followed by the term string index
+    TermEqual = 7     # Followed by the term and count string indexes
+    TermGreater = 8   # Followed by the term and count string indexes
+
+class LogicEncoder:
+    """
+    Encodes term definitions into the precompiled logic format:
+    every string is interned in a single table and rules are flattened into prefix integer code.
+    """
+    strings: list[str]
+    _indexes: dict[str, int]
+
+    def __init__(self) -> None:
+        self.strings = []
+        self._indexes = {}
+
+    def intern(self, value: str) -> int:
+        idx = self._indexes.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self._indexes[value] = idx
+            self.strings.append(value)
+        return idx
+
+    def encode(self, sections: dict[str, list[rule.TermDefinition]], sources: dict[str, str]) -> dict[str, Any]:
+        encoded: dict[str, list[list[Any]]] = {}
+        for name, definitions in sections.items():
+            encoded[name] = [
+                [int(definition.stateless), self.intern(definition.term), self.encode_rule(definition.rule)]
+                for definition in definitions
+            ]
+        return {
+            "version": FORMAT_VERSION,
+            "sources": sources,
+            "strings": self.strings,
+            "sections": encoded,
+        }
+
+    def encode_rule(self, logic: rule.Rule, code: Optional[list[int]] = None) -> list[int]:
+        if code is None:
+            code = []
+
+        if isinstance(logic, rule.Null):
+            code.append(Op.Null)
+        elif isinstance(logic, rule.Boolean):
+            code.append(Op.BooleanTrue if logic.value else Op.BooleanFalse)
+        elif isinstance(logic, rule.Group):
+            code.append(Op.Group)
+            self.encode_rule(logic.rule, code)
+        elif isinstance(logic, (rule.Conjunction, rule.Disjunction)):
+            code.append(Op.Conjunction if isinstance(logic, rule.Conjunction) else Op.Disjunction)
+            self.encode_rule(logic.a, code)
+            self.encode_rule(logic.b, code)
+        elif isinstance(logic, rule.Term):
+            if logic.modifier is None:
+                code += [Op.Term, self.intern(logic.term)]
+            else:
+                operator, count = logic.modifier
+                op = Op.TermEqual if operator == rule.TermModifierOperator.Equal else Op.TermGreater
+                code += [op, self.intern(logic.term), self.intern(count)]
+        else:
+            raise Exception(f"Invalid rule: {logic}")
+        return code
+
+class LogicDecoder:
+    """Rebuilds the term definitions of the precompiled logic format."""
+    strings: list[str]
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        version = data.get("version")
+        if version != FORMAT_VERSION:
+            raise Exception(f"Unsupported precompiled logic version: {version} (expected {FORMAT_VERSION})")
+        self.strings = data["strings"]
+        self.sections = data["sections"]
+
+    def decode(self, section: str) -> list[rule.TermDefinition]:
+        strings = self.strings
+        definitions: list[rule.TermDefinition] = []
+        for stateless, term, code in self.sections[section]:
+            logic, end = self.decode_rule(code, 0)
+            if end != len(code):
+                raise Exception(f"Trailing code in the definition of {strings[term]}")
+            definitions.append(rule.TermDefinition(bool(stateless), strings[term], logic))
+        return definitions
+
+    def decode_rule(self, code: list[int], position: int) -> tuple[rule.Rule, int]:
+        op = code[position]
+        position += 1
+        match op:
+            case Op.Null:
+                return rule.Null(), position
+            case Op.BooleanFalse | Op.BooleanTrue:
+                return rule.Boolean(op == Op.BooleanTrue), position
+            case Op.Group:
+                inner, position = self.decode_rule(code, position)
+                return rule.Group(inner), position
+            case Op.Conjunction | Op.Disjunction:
+                a, position = self.decode_rule(code, position)
+                b, position = self.decode_rule(code, position)
+                return (rule.Conjunction(a, b) if op == Op.Conjunction else rule.Disjunction(a, b)), position
+            case Op.Term:
+                return rule.Term(self.strings[code[position]]), position + 1
+            case Op.TermEqual | Op.TermGreater:
+                operator = rule.TermModifierOperator.Equal if op == Op.TermEqual else rule.TermModifierOperator.Greater
+                modifier = (operator, self.strings[code[position + 1]])
+                return rule.Term(self.strings[code[position]], modifier), position + 2
+            case _:
+                raise Exception(f"Invalid op code {op} at {position - 1}")
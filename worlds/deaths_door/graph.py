@@ -0,0 +1,153 @@
+import threading
+from typing import ClassVar, Optional, Self
+
+from BaseClasses import MultiWorld, Region
+
+from .extract import Rule as ExtractedRule, Term, Null, Boolean, Group, Conjunction, Disjunction
+from .rules import Rule, CompiledRule
+from .entrances import EntranceData
+from .events import EventData
+from .location import LocationData
+
+class Connection:
+    """One entrance of the graph. A source of `None` is the origin region."""
+    name: str
+    source: Optional[str]
+    target: str
+    rule: CompiledRule
+    indirect: tuple[str, ...]
+
+    def __init__(self, source: Optional[str], target: str, rule: CompiledRule, indirect: tuple[str, ...]):
+        self.name = f"{source or LogicGraph.origin} -> {target}"
+        self.source = source
+        self.target = target
+        self.rule = rule
+        self.indirect = indirect
+
+class Placement:
+    """Parent region of a location and what remains of its rule once in it."""
+    parent: Optional[str]
+    rule: CompiledRule
+
+    def __init__(self, parent: Optional[str], rule: CompiledRule):
+        self.parent = parent
+        self.rule = rule
+
+class LogicGraph:
+    """
+    The region rules (waypoints) and transitions as a graph, so the generator's region search can prune the logic
+    instead of evaluating it from the start for every location.
+
+    Each waypoint and transition is a node. Every alternative of a node's rule becomes an entrance from the node it
+    requires to be in (or the origin if there isn't any) with the rest of the alternative as the entrance's rule.
+    Nodes still referenced by those rules are checked as reachable regions and registered as indirect conditions.
+    Built once per process and shared by every world.
+    """
+    origin: ClassVar[str] = "Menu"
+
+    _instance: ClassVar[Optional[Self]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    nodes: frozenset[str]
+    connections: list[Connection]
+    _placements: dict[Rule, Placement]
+
+    def __init__(self):
+        # All the items, events and transitions must be known before the rules are compiled.
+        transitions = [data.name for data in EntranceData.get_data()]
+        EventData.get_data()
+        regions = Rule.regions()
+
+        self.nodes = frozenset(regions) | frozenset(transitions)
+        self.connections = []
+        self._placements = {}
+
+        for name, rule in regions.items():
+            self._connect(name, rule)
+        for data in EntranceData.get_data():
+            self._connect(data.name, data.rule)
+
+    @classmethod
+    def get(cls) -> Self:
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def place(self, rule: Rule) -> Placement:
+        """Find where a location with the given rule should be put."""
+        placement = self._placements.get(rule)
+        if placement is None:
+            alternatives = self._alternatives(rule.logic)
+            if len(alternatives) == 1:
+                parent, condition = alternatives[0]
+                placement = Placement(parent, Rule(condition).compile_graph(self.nodes))
+            else:
+                placement = Placement(None, rule.compile_graph(self.nodes))
+            self._placements[rule] = placement
+        return placement
+
+    def create_regions(self, multiworld: MultiWorld, player: int) -> dict[Optional[str], Region]:
+        """Create the regions and entrances of the graph for a player. The origin is keyed by `None`."""
+        origin = Region(self.origin, player, multiworld)
+        regions: dict[Optional[str], Region] = { None: origin }
+        for name in sorted(self.nodes):
+            regions[name] = Region(name, player, multiworld)
+
+        for connection in self.connections:
+            rule = connection.rule
+            entrance = regions[connection.source].connect(
+                regions[connection.target],
+                connection.name,
+                lambda state, rule=rule: rule(state, player)
+            )
+            for node in connection.indirect:
+                multiworld.register_indirect_condition(regions[node], entrance)
+
+        multiworld.regions.extend(regions.values())
+        return regions
+
+    def _connect(self, target: str, rule: Rule):
+        conditions: dict[Optional[str], list[ExtractedRule]] = {}
+        for source, condition in self._alternatives(rule.logic):
+            if source == target:
+                continue
+            conditions.setdefault(source, []).append(condition)
+
+        for source, alternatives in conditions.items():
+            condition = alternatives[0]
+            for alternative in alternatives[1:]:
+                condition = Disjunction(condition, alternative)
+            indirect = tuple(sorted(self._referenced_nodes(condition)))
+            self.connections.append(Connection(source, target, Rule(condition).compile_graph(self.nodes), indirect))
+
+    def _alternatives(self, logic: ExtractedRule) -> list[tuple[Optional[str], ExtractedRule]]:
+        alternatives: list[tuple[Optional[str], ExtractedRule]] = []
+        for alternative in Rule.flatten(logic, Disjunction):
+            if isinstance(alternative, Boolean) and not alternative.value:
+                continue
+
+            requirements = Rule.flatten(alternative, Conjunction)
+            source: Optional[str] = None
+            for idx, requirement in enumerate(requirements):
+                if isinstance(requirement, Term) and requirement.to_name() in self.nodes:
+                    source = requirement.to_name()
+                    requirements = requirements[:idx] + requirements[idx + 1:]
+                    break
+
+            condition: ExtractedRule = Null()
+            for requirement in requirements:
+                condition = requirement if isinstance(condition, Null) else Conjunction(condition, requirement)
+            alternatives.append((source, condition))
+        return alternatives
+
+    def _referenced_nodes(self, logic: ExtractedRule) -> set[str]:
+        if isinstance(logic, Term):
+            name = logic.to_name()
+            return { name } if name in self.nodes else set()
+        if isinstance(logic, Group):
+            return self._referenced_nodes(logic.rule)
+        if isinstance(logic, (Conjunction, Disjunction)):
+            return self._referenced_nodes(logic.a) | self._referenced_nodes(logic.b)
+        return set()
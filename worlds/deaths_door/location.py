@@ -1,10 +1,11 @@
-from typing import Any, Optional
+from typing import Any, Optional, Self
 
 from BaseClasses import Location, Region
 
 from .abc import Data, Idable
 from .extract import RuleJsonSerializer, TermDefinition
 from .rules import Rule
+from .logic import PrecompiledLogic
 
 class LocationData(Data, Idable):
     data_file = "locations.json"
@@ -19,6 +20,13 @@ class LocationData(Data, Idable):
     def to_game_location(self, player: int, region: Region) -> "GameLocation":
         return GameLocation(self, player, region)
 
+    @classmethod
+    def load_compiled(cls) -> Optional[list[Self]]:
+        definitions = PrecompiledLogic.section(cls.data_file)
+        if definitions is None:
+            return None
+        return [cls(definition.to_name(), Rule(definition.rule)) for definition in definitions]
+
     @classmethod
     def object_hook(cls, dict: dict[Any, Any]) -> Any:
         definition = RuleJsonSerializer.object_hook(dict)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, ClassVar, Optional
+
+from .abc import Data
+from .extract import LogicDecoder, TermDefinition
+
+class PrecompiledLogic:
+    """
+    The logic precompiled by the extract tool, holding every data file in a single compact artifact.
+    It's ignored when missing or when it doesn't match the JSON files next to it.
+    """
+    data_dir: ClassVar[Path] = Data.data_dir
+    data_file: ClassVar[str] = "logic.json"
+
+    _decoder: ClassVar[Optional[LogicDecoder]] = None
+    _loaded: ClassVar[bool] = False
+    _load_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def section(cls, data_file: str) -> Optional[list[TermDefinition]]:
+        """Definitions of the given data file, or `None` if they have to be loaded from the JSON file."""
+        decoder = cls._load()
+        name = Path(data_file).stem
+        if decoder is None or name not in decoder.sections:
+            return None
+        return decoder.decode(name)
+
+    @classmethod
+    def _load(cls) -> Optional[LogicDecoder]:
+        if cls._loaded:
+            return cls._decoder
+
+        with cls._load_lock:
+            if not cls._loaded:
+                cls._decoder = cls._read()
+                cls._loaded = True
+        return cls._decoder
+
+    @classmethod
+    def _read(cls) -> Optional[LogicDecoder]:
+        file = cls.data_dir / cls.data_file
+        if not file.exists():
+            return None
+
+        try:
+            data: dict[str, Any] = json.loads(file.read_bytes())
+            decoder = LogicDecoder(data)
+        except Exception as e:
+            logging.warning(f"Ignoring the precompiled Death's Door logic {file}: {e}")
+            return None
+
+        for name, digest in data.get("sources", {}).items():
+            source = cls.data_dir / f"{name}.json"
+            if source.exists() and hashlib.sha1(source.read_bytes()).hexdigest() != digest:
+                logging.warning(f"Ignoring the precompiled Death's Door logic, {source} changed since it was built.")
+                return None
+        return decoder
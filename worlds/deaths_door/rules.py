@@ -1,27 +1,171 @@
 import json
-from typing import Any, ClassVar, Optional, Self, Union
+import threading
+from types import MappingProxyType
+from typing import AbstractSet, Any, Callable, ClassVar, Mapping, Optional, Self, Union
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, MultiWorld
+from worlds.AutoWorld import AutoLogicRegister
 
 from .extract import Rule as ExtractedRule, Term, TermModifierOperator, Null, Group, Conjunction, Disjunction, TermDefinition, RuleJsonSerializer, Boolean
 from .abc import ParseObjectHook, Data
+from .logic import PrecompiledLogic
+
+CompiledRule = Callable[[CollectionState, int], bool]
+
+def _always_true(state: CollectionState, player: int) -> bool:
+    return True
+
+def _always_false(state: CollectionState, player: int) -> bool:
+    return False
+
+def _raise_on_evaluate(error: str) -> CompiledRule:
+    # Errors are deferred to evaluation so a compiled rule fails exactly where the interpreter would.
+    def rule(state: CollectionState, player: int) -> bool:
+        raise Exception(error)
+    return rule
+
+def _memoized(name: str, rule: CompiledRule) -> CompiledRule:
+    def memo(state: CollectionState, player: int) -> bool:
+        cache = state._deaths_door_region_cache[player]
+        result = cache.get(name)
+        if result is None:
+            result = cache[name] = rule(state, player)
+        return result
+    return memo
+
+def _can_reach(name: str) -> CompiledRule:
+    def rule(state: CollectionState, player: int) -> bool:
+        return state.can_reach_region(name, player)
+    return rule
+
+def _has(name: str, count: int) -> CompiledRule:
+    def rule(state: CollectionState, player: int) -> bool:
+        return state.prog_items[player][name] >= count
+    return rule
+
+def _has_all_counts(counts: tuple[tuple[str, int], ...]) -> CompiledRule:
+    def rule(state: CollectionState, player: int) -> bool:
+        prog_items = state.prog_items[player]
+        for name, count in counts:
+            if prog_items[name] < count:
+                return False
+        return True
+    return rule
+
+def _has_any_count(counts: tuple[tuple[str, int], ...]) -> CompiledRule:
+    def rule(state: CollectionState, player: int) -> bool:
+        prog_items = state.prog_items[player]
+        for name, count in counts:
+            if prog_items[name] >= count:
+                return True
+        return False
+    return rule
+
+def _all_of(rules: tuple[CompiledRule, ...]) -> CompiledRule:
+    if len(rules) == 2:
+        first, second = rules
+        return lambda state, player: first(state, player) and second(state, player)
+    def rule(state: CollectionState, player: int) -> bool:
+        for sub_rule in rules:
+            if not sub_rule(state, player):
+                return False
+        return True
+    return rule
+
+def _any_of(rules: tuple[CompiledRule, ...]) -> CompiledRule:
+    if len(rules) == 2:
+        first, second = rules
+        return lambda state, player: first(state, player) or second(state, player)
+    def rule(state: CollectionState, player: int) -> bool:
+        for sub_rule in rules:
+            if sub_rule(state, player):
+                return True
+        return False
+    return rule
+
+class DeathsDoorCollectionState(metaclass=AutoLogicRegister):
+    """Per player memo of the region rule results. Only valid until the player's items change."""
+    def init_mixin(self, parent: MultiWorld):
+        players = parent.get_game_players("Death's Door") + parent.get_game_groups("Death's Door")
+        self._deaths_door_region_cache = {player: {} for player in players}
+
+    def copy_mixin(self, ret: CollectionState) -> CollectionState:
+        ret._deaths_door_region_cache = {player: cache.copy() for player, cache in self._deaths_door_region_cache.items()}
+        return ret
 
 class Rule(ParseObjectHook):
     data_dir = Data.data_dir
     data_file = "regions.json"
 
     _items: ClassVar[set[str]] = set()
-    _rules: ClassVar[dict[str, Self]] = {}
+    _rules: ClassVar[Mapping[str, Self]] = MappingProxyType({})
+    _load_lock: ClassVar[threading.Lock] = threading.Lock()
+    _loaded: ClassVar[bool] = False
 
     name: str
     logic: ExtractedRule
+    _compiled: Optional[CompiledRule]
+    _memoized: Optional[CompiledRule]
+    _dependencies: Optional[frozenset[str]]
 
     def __init__(self, logic: ExtractedRule):
         self.logic = logic
+        self._compiled = None
+        self._memoized = None
+        self._dependencies = None
+
+    def evaluate(self, player: int, state: CollectionState) -> bool:
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self.compile()
+        return compiled(state, player)
 
-    def evaluate(self, player: int, state: CollectionState, stack: list[str] = []) -> bool:
+    def interpret(self, player: int, state: CollectionState, stack: list[str] = []) -> bool:
+        """Evaluate the rule by walking the logic tree. Kept as the reference for the compiled rules."""
         return self._evaluate_rule(self.logic, player, state, stack)
 
+    def compile(self, stack: Optional[list[str]] = None) -> CompiledRule:
+        """
+        Turn the logic tree into a closure taking `(state, player)`.
+        Term names, counts and referenced rules are resolved once, so compilation must happen after all the items,
+        events and entrances are known.
+        """
+        if self._compiled is None:
+            self._compiled = self._compile_rule(self.logic, stack if stack is not None else [])
+        return self._compiled
+
+    def compile_graph(self, nodes: AbstractSet[str]) -> CompiledRule:
+        """
+        Same as `compile`, but the terms named in `nodes` are checked as reachable regions instead of being evaluated.
+        The result isn't cached since it depends on `nodes`.
+        """
+        return self._compile_rule(self.logic, [], nodes)
+
+    def dependencies(self, stack: Optional[list[str]] = None) -> frozenset[str]:
+        """Names of the items the rule depends on, including the ones of the referenced region rules."""
+        if self._dependencies is None:
+            self._dependencies = frozenset(self._collect_dependencies(self.logic, stack if stack is not None else []))
+        return self._dependencies
+
+    def _collect_dependencies(self, rule: ExtractedRule, stack: list[str]) -> set[str]:
+        if isinstance(rule, Group):
+            return self._collect_dependencies(rule.rule, stack)
+        if isinstance(rule, (Conjunction, Disjunction)):
+            return self._collect_dependencies(rule.a, stack) | self._collect_dependencies(rule.b, stack)
+        if not isinstance(rule, Term):
+            return set()
+
+        name = rule.to_name()
+        term_rule = self._get_by_name(name)
+        if isinstance(term_rule, str):
+            return { name }
+        if isinstance(term_rule, Rule) and name not in stack:
+            stack.append(name)
+            dependencies = term_rule.dependencies(stack)
+            stack.pop()
+            return set(dependencies)
+        return set()
+
     def _evaluate_rule(self, rule: ExtractedRule, player: int, state: CollectionState, stack: list[str]) -> bool:
         if isinstance(rule, Null):
             return True
@@ -46,37 +190,148 @@ class Rule(ParseObjectHook):
             if name in stack:
                 raise Exception(f"Circular reference found: {name} (lower: {stack})")
             stack.append(name)
-            result = term_rule.evaluate(player, state)
+            result = term_rule.interpret(player, state, stack)
             stack.pop()
             return result
 
         if isinstance(term_rule, str):
-            match term.modifier:
-                case (TermModifierOperator.Greater, count_str):
-                    count = int(count_str) + 1
-                case (TermModifierOperator.Equal, count_str):
-                    count = int(count_str)
-                case _:
-                    count = 1
-            return state.has(name, player, count)
+            return state.has(name, player, self._term_count(term))
 
         raise Exception(f"Unrecognized term: {term.term}")
 
+    def _compile_rule(self, rule: ExtractedRule, stack: list[str], nodes: AbstractSet[str] = frozenset()) -> CompiledRule:
+        if isinstance(rule, Null):
+            return _always_true
+        if isinstance(rule, Boolean):
+            return _always_true if rule.value else _always_false
+        elif isinstance(rule, Group):
+            return self._compile_rule(rule.rule, stack, nodes)
+        elif isinstance(rule, Term):
+            return self._compile_term(rule, stack, nodes)
+        elif isinstance(rule, (Conjunction, Disjunction)):
+            return self._compile_operation(rule, stack, nodes)
+        else:
+            raise Exception(f"Invalid rule: {rule}")
+
+    def _compile_term(self, term: Term, stack: list[str], nodes: AbstractSet[str]) -> CompiledRule:
+        name = term.to_name()
+        if name in nodes:
+            return _can_reach(name)
+        term_rule = self._get_by_name(name)
+
+        if isinstance(term_rule, Rule):
+            # Region rules are referenced by many locations, their result is memoized on the state.
+            if term_rule._memoized is not None:
+                return term_rule._memoized
+            if name in stack:
+                return _raise_on_evaluate(f"Circular reference found: {name} (lower: {stack})")
+            stack.append(name)
+            compiled = term_rule.compile(stack)
+            stack.pop()
+            term_rule._memoized = _memoized(name, compiled)
+            return term_rule._memoized
+
+        if isinstance(term_rule, str):
+            return _has(name, self._term_count(term))
+
+        return _raise_on_evaluate(f"Unrecognized term: {term.term}")
+
+    def _compile_operation(self, rule: Union[Conjunction, Disjunction], stack: list[str], nodes: AbstractSet[str]) -> CompiledRule:
+        # Chains of the same operator are flattened into a single call, with the plain item
+        # checks merged together and tested before any referenced rule.
+        is_conjunction = isinstance(rule, Conjunction)
+        counts: dict[str, int] = {}
+        sub_rules: list[CompiledRule] = []
+
+        for operand in self.flatten(rule, type(rule)):
+            if isinstance(operand, Null) or isinstance(operand, Boolean):
+                value = operand.value if isinstance(operand, Boolean) else True
+                if value != is_conjunction:
+                    return _always_true if value else _always_false
+                continue
+
+            if isinstance(operand, Term) and operand.to_name() not in nodes and isinstance(self._get_by_name(operand.to_name()), str):
+                name = operand.to_name()
+                count = self._term_count(operand)
+                if name in counts:
+                    count = max(count, counts[name]) if is_conjunction else min(count, counts[name])
+                counts[name] = count
+                continue
+
+            sub_rules.append(self._compile_rule(operand, stack, nodes))
+
+        if len(counts) == 1:
+            [(name, count)] = counts.items()
+            sub_rules.insert(0, _has(name, count))
+        elif counts:
+            items = tuple(counts.items())
+            sub_rules.insert(0, _has_all_counts(items) if is_conjunction else _has_any_count(items))
+
+        if len(sub_rules) == 0:
+            return _always_true if is_conjunction else _always_false
+        if len(sub_rules) == 1:
+            return sub_rules[0]
+        return _all_of(tuple(sub_rules)) if is_conjunction else _any_of(tuple(sub_rules))
+
+    @staticmethod
+    def flatten(rule: ExtractedRule, operator: type[Union[Conjunction, Disjunction]]) -> list[ExtractedRule]:
+        """List the operands of a chain of `operator`, looking through groups."""
+        operands: list[ExtractedRule] = []
+        pending: list[ExtractedRule] = [rule]
+        while len(pending) > 0:
+            node = pending.pop()
+            while isinstance(node, Group):
+                node = node.rule
+            if isinstance(node, operator):
+                pending.append(node.b)
+                pending.append(node.a)
+            else:
+                operands.append(node)
+        return operands
+
+    @staticmethod
+    def _term_count(term: Term) -> int:
+        match term.modifier:
+            case (TermModifierOperator.Greater, count_str):
+                return int(count_str) + 1
+            case (TermModifierOperator.Equal, count_str):
+                return int(count_str)
+            case _:
+                return 1
+
     @classmethod
     def add_item(cls, name: str):
         cls._items.add(name)
 
     @classmethod
-    def add_rule(cls, name: str, rule: ExtractedRule):
-        cls._rules[name] = cls(rule)
+    def regions(cls) -> Mapping[str, Self]:
+        cls.load()
+        return cls._rules
 
     @classmethod
     def load(cls):
-        definitions: list[TermDefinition] = []
-        with (cls.data_dir / cls.data_file).open() as file:
-            definitions = json.load(file, object_hook=cls.object_hook)
-        for definition in definitions:
-            cls.add_rule(definition.to_name(), definition.rule)
+        """
+        Load the region rules once per process. The resulting table is shared by every Death's Door world and never
+        modified afterward, so calling this for each slot is free.
+        """
+        if cls._loaded:
+            return
+
+        with cls._load_lock:
+            if cls._loaded:
+                return
+            rules = {definition.to_name(): cls(definition.rule) for definition in cls._load_definitions()}
+            cls._rules = MappingProxyType(rules)
+            cls._loaded = True
+
+    @classmethod
+    def _load_definitions(cls) -> list[TermDefinition]:
+        compiled = PrecompiledLogic.section(cls.data_file)
+        if compiled is not None:
+            return compiled
+
+        with (cls.data_dir / cls.data_file).open("rb") as file:
+            return json.load(file, object_hook=cls.object_hook)
 
     @classmethod
     def object_hook(cls, dict: dict[Any, Any]) -> Any:
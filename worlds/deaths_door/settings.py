@@ -1,5 +1,12 @@
+from typing import Union
+
 import settings
 
 class Settings(settings.Group):
-    pass
+    class GraphMode(settings.Bool):
+        """
+        Build the logic as regions and entrances instead of a single region.
+        Lets the generator prune unreachable areas, which is faster with many Death's Door players.
+        """
 
+    graph_mode: Union[GraphMode, bool] = False
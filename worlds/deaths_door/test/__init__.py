@@ -0,0 +1,4 @@
+from test.bases import WorldTestBase
+
+class DeathsDoorTestBase(WorldTestBase):
+    game = "Death's Door"
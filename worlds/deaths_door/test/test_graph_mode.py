@@ -0,0 +1,35 @@
+from typing import Optional
+
+from BaseClasses import MultiWorld
+from test.general import setup_solo_multiworld
+
+from .. import DeathsDoorWorld
+from . import DeathsDoorTestBase
+
+def reachable_locations(multiworld: MultiWorld) -> set[str]:
+    state = multiworld.get_all_state(False)
+    return {loc.name for loc in multiworld.get_locations(1) if loc.address is not None and loc.can_reach(state)}
+
+class TestGraphMode(DeathsDoorTestBase):
+    """Runs the default world tests with the `graph_mode` host setting on."""
+
+    def world_setup(self, seed: Optional[int] = None) -> None:
+        graph_mode = DeathsDoorWorld.settings.graph_mode
+        DeathsDoorWorld.settings.graph_mode = True
+        try:
+            super().world_setup(seed)
+        finally:
+            DeathsDoorWorld.settings.graph_mode = graph_mode
+
+    def test_reachable_locations_match_default_mode(self) -> None:
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                self.world_setup(seed)
+                self.assertGreater(len(self.multiworld.regions), 1, "graph mode did not build the region graph")
+                self.assertTrue(self.multiworld.can_beat_game(self.multiworld.get_all_state(False)))
+
+                default = setup_solo_multiworld(DeathsDoorWorld, seed=seed)
+                self.assertEqual(len(default.regions), 1)
+                expected = {loc.name for loc in default.get_locations(1) if loc.address is not None}
+                self.assertEqual(reachable_locations(default), expected)
+                self.assertEqual(reachable_locations(self.multiworld), expected)
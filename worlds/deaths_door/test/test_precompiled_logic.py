@@ -0,0 +1,77 @@
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+from ..abc import Data
+from ..extract import LogicDecoder, LogicEncoder, Rule as ExtractedRule, RuleJsonSerializer, TermDefinition
+from ..logic import PrecompiledLogic
+from ..rules import Rule
+
+SECTIONS = ("locations", "events", "regions", "entrances")
+EXTRACT_DIR = Path(__file__).parent.parent / "extract"
+
+def load_json_section(name: str) -> list[TermDefinition]:
+    with (Data.data_dir / f"{name}.json").open() as file:
+        return json.load(file, object_hook=RuleJsonSerializer.object_hook)
+
+def structure(value: Any) -> Any:
+    """The logic tree as comparable tuples. Term modifiers are lists when loaded from JSON and tuples when decoded."""
+    if isinstance(value, TermDefinition):
+        return value.stateless, value.term, structure(value.rule)
+    if isinstance(value, ExtractedRule):
+        return type(value).__name__, tuple((key, structure(attr)) for key, attr in sorted(vars(value).items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(structure(item) for item in value)
+    return value
+
+class TestPrecompiledLogic(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        sections = {name: load_json_section(name) for name in SECTIONS}
+        encoded = json.loads(json.dumps(LogicEncoder().encode(sections, {})))
+        decoder = LogicDecoder(encoded)
+        for name, definitions in sections.items():
+            with self.subTest(section=name):
+                self.assertEqual(structure(decoder.decode(name)), structure(definitions))
+
+    def test_artifact_matches_json(self) -> None:
+        if not (PrecompiledLogic.data_dir / PrecompiledLogic.data_file).exists():
+            self.skipTest("The precompiled logic was not extracted")
+
+        for name in SECTIONS:
+            with self.subTest(section=name):
+                definitions = PrecompiledLogic.section(f"{name}.json")
+                self.assertIsNotNone(definitions, "the precompiled logic is out of date")
+                self.assertEqual(structure(definitions), structure(load_json_section(name)))
+
+        # The region rules are compiled from the precompiled logic.
+        regions = Rule.regions()
+        expected = {definition.to_name(): structure(definition.rule) for definition in load_json_section("regions")}
+        self.assertEqual({name: structure(rule.logic) for name, rule in regions.items()}, expected)
+
+    def test_extract_check(self) -> None:
+        def check(output: Path) -> int:
+            return subprocess.run([sys.executable, "extract.py", "--check", "-o", str(output)], cwd=EXTRACT_DIR,
+                                  capture_output=True).returncode
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = Path(temp_dir)
+            for name in SECTIONS:
+                shutil.copy(Data.data_dir / f"{name}.json", output)
+            self.assertEqual(check(output), 1, "missing precompiled logic passed the check")
+
+            save = "import sys; from pathlib import Path; import extract; " \
+                   "extract.save_compiled(Path(sys.argv[1]), sys.argv[2:])"
+            subprocess.run([sys.executable, "-c", save, str(output), *SECTIONS], cwd=EXTRACT_DIR, check=True,
+                           capture_output=True)
+            self.assertEqual(check(output), 0)
+
+            regions = load_json_section("regions")
+            regions.pop()
+            with (output / "regions.json").open("w") as file:
+                json.dump(regions, file, indent=2, cls=RuleJsonSerializer)
+            self.assertEqual(check(output), 1, "outdated precompiled logic passed the check")